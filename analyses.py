@@ -0,0 +1,133 @@
+"""Calculs dérivés des tables, pour la préparation des séances et l'analyse hors ligne.
+
+Chaque fonction reçoit les DataFrames tels que lus par sheets.py (ou relus depuis un instantané) et
+retourne un DataFrame, sans accès aux Google Sheets.
+"""
+import pandas as pd
+
+from completeness import week_of
+from running_stats import RunningStats
+
+REVIEW_LEVELS = ["Insuffisant", "Suffisant", "Excellent"]
+
+# Critères de la grille d'évaluation par les pairs (une colonne de niveau par critère)
+REVIEW_CRITERIA = ["objectif", "coherence",
+                   "sources", "vocabulaire",
+                   "facteurs", "conditions", "repetitions", "temoins",
+                   "precision_methodes", "homogeneite_methodes", "danger_methodes",
+                   "stockage", "analyse",
+                   "forme", "orthographe", "schemas", "materiel", "planning", "faisabilite"]
+
+
+def _numeric(df, column):
+    if column not in df.columns:
+        return pd.Series(float("nan"), index=df.index)
+    return pd.to_numeric(df[column].astype("string").str.replace(",", ".", regex=False), errors="coerce")
+
+
+# --- IRGA ---
+def irga_quantities(df):
+    """Mesures de l'IRGA complétées des grandeurs dérivées.
+
+    delta_CO2 : CO2 absorbé par la feuille (CO2 in - CO2 out, ppm) ; delta_H2O : vapeur d'eau émise
+    (H2O out - H2O in, mbar) ; WUE : efficience d'utilisation de l'eau (A / E, µmol CO2 / mmol H2O).
+    """
+    a, e = _numeric(df, "A"), _numeric(df, "E")
+    return df.assign(
+        delta_CO2=_numeric(df, "CO2_in") - _numeric(df, "CO2_out"),
+        delta_H2O=_numeric(df, "H2O_out") - _numeric(df, "H2O_in"),
+        WUE=(a / e).where(e != 0),
+    )
+
+
+def irga_by_treatment(df, groups=("traitement", "rang_f")):
+    """Effectif, moyenne, écart-type et extrêmes de A, E et WUE par traitement (et rang de feuille)"""
+    quantities = irga_quantities(df)
+    stats = RunningStats.from_frame(quantities, ["A", "E", "WUE"], groups)
+    return pd.concat([stats.summary(variable).assign(variable=variable) for variable in ["A", "E", "WUE"]],
+                     ignore_index=True)
+
+
+# --- TOURNESOLS ---
+def growth_rates(observations, debut):
+    """Observations de la plante entière triées par tournesol et par date, avec la semaine du quadrimestre
+    et la vitesse de croissance depuis l'observation précédente (cm/jour)"""
+    if not {"plante_ID", "date", "hauteur"}.issubset(observations.columns):
+        return pd.DataFrame()
+
+    obs = observations.assign(
+        plante_ID=observations["plante_ID"].astype("string"),
+        date=pd.to_datetime(observations["date"].astype("string"), format="%d/%m/%Y", errors="coerce"),
+        hauteur=_numeric(observations, "hauteur"),
+        semaine=week_of(observations["date"], debut).to_numpy(),
+    ).dropna(subset=["date"]).sort_values(["plante_ID", "date"], kind="stable")
+
+    by_plant = obs.groupby("plante_ID")
+    jours = by_plant["date"].diff().dt.days
+    obs["vitesse_cm_jour"] = (by_plant["hauteur"].diff() / jours).where(jours > 0)
+    return obs.reset_index(drop=True)
+
+
+def growth_table(observations, debut):
+    """Hauteur de chaque tournesol par semaine (dernière observation de la semaine)"""
+    rates = growth_rates(observations, debut)
+    if rates.empty:
+        return pd.DataFrame()
+    table = rates.dropna(subset=["semaine"]).pivot_table(index="plante_ID", columns="semaine", values="hauteur",
+                                                         aggfunc="last")
+    return table.rename(columns=lambda semaine: f"S{semaine}")
+
+
+def growth_summary(observations, pieces, debut):
+    """Par tournesol : hauteur finale, vitesse moyenne de croissance et conditions de la pièce"""
+    rates = growth_rates(observations, debut)
+    if rates.empty:
+        return pd.DataFrame()
+
+    aggregations = {
+        "observations": ("date", "size"),
+        "premiere_observation": ("date", "min"),
+        "derniere_observation": ("date", "max"),
+        "hauteur_finale": ("hauteur", "last"),
+    }
+    if "stade" in rates.columns:
+        aggregations["dernier_stade"] = ("stade", "last")
+    summary = rates.groupby("plante_ID").agg(**aggregations)
+    jours = (summary["derniere_observation"] - summary["premiere_observation"]).dt.days
+    premiere = rates.groupby("plante_ID")["hauteur"].first()
+    summary["vitesse_moyenne_cm_jour"] = ((summary["hauteur_finale"] - premiere) / jours).where(jours > 0)
+
+    if "plante_ID" in pieces.columns:
+        conditions = [col for col in ["orientation", "distance_fenetre", "heure_lum_nat", "heure_lum_art", "temp"]
+                      if col in pieces.columns]
+        pieces = pieces.assign(plante_ID=pieces["plante_ID"].astype("string"))
+        summary = summary.join(pieces.drop_duplicates("plante_ID", keep="last").set_index("plante_ID")[conditions])
+    return summary.reset_index()
+
+
+# --- ÉVALUATION PAR LES PAIRS ---
+def review_counts(reviews):
+    """Nombre d'évaluations de chaque niveau, par équipe évaluée et par critère"""
+    criteria = [col for col in REVIEW_CRITERIA if col in reviews.columns]
+    if "equipe" not in reviews.columns or not criteria:
+        return pd.DataFrame(columns=["equipe", "critere"] + REVIEW_LEVELS)
+
+    long = reviews.melt(id_vars="equipe", value_vars=criteria, var_name="critere", value_name="niveau")
+    long = long[long["niveau"].isin(REVIEW_LEVELS)]
+    counts = long.groupby(["equipe", "critere", "niveau"]).size().unstack(fill_value=0)
+    return counts.reindex(columns=REVIEW_LEVELS, fill_value=0).reset_index().rename_axis(columns=None)
+
+
+def review_scores(reviews):
+    """Score moyen par équipe et par critère (Insuffisant = 0, Suffisant = 1, Excellent = 2)"""
+    counts = review_counts(reviews)
+    if counts.empty:
+        return pd.DataFrame()
+
+    total = counts[REVIEW_LEVELS].sum(axis=1)
+    counts["score"] = (counts["Suffisant"] + 2 * counts["Excellent"]) / total
+    scores = counts.pivot(index="equipe", columns="critere", values="score")
+    scores = scores.reindex(columns=[col for col in REVIEW_CRITERIA if col in scores.columns])
+    scores.insert(0, "evaluations", reviews.groupby("equipe").size())
+    scores.insert(1, "score_global", scores[scores.columns[1:]].mean(axis=1))
+    return scores.reset_index().rename_axis(columns=None)
@@ -1,102 +1,567 @@
-import gspread
+import time
+_T_SCRIPT = time.perf_counter()
+
+import functools
+import hashlib
+import hmac
 import io
-import pytz
+import os
+import tempfile
+import threading
+import zipfile
 import pandas as pd
 import streamlit as st
+from collections import Counter, defaultdict
 from datetime import datetime
-from google.oauth2.service_account import Credentials
+from zoneinfo import ZoneInfo
+
+from analyses import REVIEW_CRITERIA, REVIEW_LEVELS
+from archive import archive_rows, current_academic_year, list_archives, read_archive, read_unarchived
+from broadcast import Channel
+from completeness import CompletenessTracker, MISSING, default_term_start, week_of
+from positions import cluster_positions, parse_positions, summarize_clusters
+from profiler import SamplingProfiler, list_profiles, read_profile, save_profile, top_frames
+from running_stats import RunningStats
+from rate_limiter import TokenBucket, WRITE, READ, LOW, PRIORITY_NAMES
+from shared_cache import SharedCache
+from sheets import (DATASETS, DATE_COLUMNS, INSCRIPTION, OBS_FEUILLE, OBS_PLANTE, PEER_REVIEW, PIECE,
+                    SHEETS_BURST, SHEETS_QUEUE_TIMEOUT, SHEETS_REQUESTS_HEADERS, SHEETS_REQUESTS_PER_CALL,
+                    SHEETS_REQUESTS_PER_MINUTE, HeadersChanged, archive_dir, fetch_revision, iter_chunks,
+                    make_credentials, read_columns, read_worksheet, to_arrow, to_csv, to_excel)
 
 # Définition de quelques constantes
 TITLE = "LBIR1251 - Travaux pratiques : collecte des données"
-TIME_ZONE = pytz.timezone('Europe/Brussels')
+TIME_ZONE = ZoneInfo('Europe/Brussels')
 st.set_page_config(page_title=TITLE, layout="wide")
 
-INSCRIPTION = 'inscription'
-PIECE = 'piece'
-OBS_PLANTE = 'obs_plante'
-OBS_FEUILLE = 'obs_feuille'
+# Nombre de lignes écrites à la fois lors de l'export global
+EXPORT_CHUNK_ROWS = 1000
+# Fichier de l'export global listant les tables absentes ou anciennes
+EXPORT_REPORT = "tables_non_exportees.txt"
 
-PEER_REVIEW = 'peer_review'
+# Durée de validité du cache partagé des feuilles, et fréquence d'actualisation des historiques ouverts
+CACHE_TTL = 60
+HISTORY_REFRESH = "15s"
 
-# --- FONCTION : LECTURE (AVEC CACHE) ---
-@st.cache_data(ttl=60)
-def get_df_from_url(url_key):
-    """Lit un Google Sheet à partir de sa clé dans les secrets et retourne un DataFrame"""
+# Cache partagé entre réplicas (optionnel) : durée maximale du verrou de rafraîchissement d'une feuille
+SHARED_CACHE_LOCK_TIMEOUT = 30
+
+# Profilage à la demande des exécutions du script (administrateurs) : nombre de profils gardés sur disque
+PROFILES_KEEP = 20
+
+
+# --- DÉMARRAGE À FROID ---
+# L'application est mise en veille par l'hébergeur : chaque réveil est un démarrage à froid.
+# On garde une chronologie des premières étapes (imports, 1er chargement, 1er affichage),
+# partagée par toutes les sessions du processus et affichée une seule fois dans la console.
+@st.cache_resource
+def _startup_timeline():
+    return {"debut": _T_SCRIPT, "etapes": {}, "rapport_affiche": False}
+
+
+def mark_startup(etape, duree=None):
+    """Enregistre une étape du démarrage (seule la 1ère occurrence de chaque étape est gardée)"""
+    timeline = _startup_timeline()
+    if etape not in timeline["etapes"]:
+        timeline["etapes"][etape] = (time.perf_counter() - timeline["debut"], duree)
+
+
+def startup_report():
+    """Retourne la chronologie du démarrage à froid sous forme de texte"""
+    lignes = ["Chronologie du démarrage à froid :"]
+    for etape, (instant, duree) in _startup_timeline()["etapes"].items():
+        detail = f" (durée : {duree:.3f} s)" if duree is not None else ""
+        lignes.append(f"  +{instant:7.3f} s  {etape}{detail}")
+    return "\n".join(lignes)
+
+
+def timed_import(module_name):
+    """Importe un module à la demande et note le temps d'import lors du 1er chargement"""
+    import importlib
+    import sys
+
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    debut = time.perf_counter()
+    module = importlib.import_module(module_name)
+    mark_startup(f"import {module_name}", time.perf_counter() - debut)
+    return module
+
+
+mark_startup("imports du script", time.perf_counter() - _T_SCRIPT)
+
+
+# --- PROFILAGE DES FRAGMENTS ---
+# Une interaction dans un fragment (formulaire soumis, historique actualisé) ne ré-exécute que ce
+# fragment, sans passer par le début et la fin du script : le profil de l'exécution complète ne la
+# couvre pas. Chaque fragment est donc profilé lui-même lorsqu'il est ré-exécuté seul.
+def fragment_rerun():
+    """Vrai si l'exécution en cours ne ré-exécute que des fragments (et non le script complet)"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    return ctx is not None and bool(ctx.fragment_ids_this_run)
+
+
+def profiled(fragment):
+    """Profile les ré-exécutions seules du fragment, lorsque le profilage est activé (voir profiling_enabled)"""
+    @functools.wraps(fragment)
+    def wrapper(*args, **kwargs):
+        if not fragment_rerun() or not profiling_enabled():
+            return fragment(*args, **kwargs)
+
+        profiler = SamplingProfiler(root_filename=os.path.abspath(__file__), root_function=fragment.__name__).start()
+        try:
+            return fragment(*args, **kwargs)
+        finally:
+            samples = profiler.stop()
+            if samples:
+                save_profile(profiles_dir(), samples, profiler.duration, PROFILES_KEEP, execution=fragment.__name__)
+
+    return wrapper
+
+
+# --- FONCTION : CONNEXION GOOGLE (IMPORTS DIFFÉRÉS) ---
+@st.cache_resource
+def get_credentials():
+    """Retourne les credentials du compte de service, partagés par toutes les sessions.
+
+    google-auth n'est importé qu'ici, au premier accès aux Google Sheets.
+    """
+    timed_import("google.oauth2.service_account")
+
+    # Configuration des credentials à partir des secrets Streamlit
+    return make_credentials(st.secrets["connections"]["gsheets"])
+
+
+@st.cache_resource
+def get_client():
+    """Retourne un client gspread authentifié (gspread n'est importé qu'au premier accès)"""
+    gspread = timed_import("gspread")
+    return gspread.authorize(get_credentials())
+
+
+@st.cache_resource
+def get_drive_session():
+    """Session HTTP authentifiée pour les métadonnées Drive des fichiers"""
+    transport = timed_import("google.auth.transport.requests")
+    return transport.AuthorizedSession(get_credentials())
+
+
+def get_revision(url):
+    """sheets.fetch_revision avec la session Drive de l'application (None si elle ne peut pas être créée)"""
+    timed_import("gspread.utils")
     try:
-        sks = st.secrets["connections"]["gsheets"]
-        creds = Credentials.from_service_account_info(sks, scopes=["https://www.googleapis.com/auth/spreadsheets"])
-        gc = gspread.authorize(creds)
-        url = sks.get(url_key, url_key)
-        
-        # Use get_all_values() instead of get_all_records() to get raw strings
-        worksheet = gc.open_by_url(url).sheet1
-        data = worksheet.get_all_values()
-        
-        if not data:
-            return pd.DataFrame()
-        
-        headers = data[0]
-        rows = data[1:]
-        df = pd.DataFrame(rows, columns=headers)
-        
-        # Fix: replace comma decimal separator with dot and convert to numeric where possible
-        for col in df.columns:
-            converted = df[col].str.replace(',', '.', regex=False)
+        session = get_drive_session()
+    except Exception:
+        return None
+    return fetch_revision(session, url)
+
+
+# --- FONCTION : QUOTA DE L'API GOOGLE ---
+@st.cache_resource
+def get_rate_limiter():
+    """Limiteur de débit partagé par toutes les sessions du processus"""
+    try:
+        quota = st.secrets.get("quota", {})
+    except Exception:
+        quota = {}
+    return TokenBucket(quota.get("requests_per_minute", SHEETS_REQUESTS_PER_MINUTE),
+                       quota.get("burst", SHEETS_BURST))
+
+
+def wait_for_quota(priority, requests=SHEETS_REQUESTS_PER_CALL):
+    """Attend son tour pour `requests` appels à l'API Google (les écritures passent avant les lectures)"""
+    if not get_rate_limiter().acquire(priority, requests, timeout=SHEETS_QUEUE_TIMEOUT):
+        raise TimeoutError("quota de l'API Google atteint, réessayez dans quelques instants")
+
+
+# --- CACHE PARTAGÉ DES FEUILLES ---
+# Dernière version lue de chaque feuille, partagée par toutes les sessions du processus :
+# clé -> {"df": DataFrame, "charge_le": instant (time.time()) du téléchargement, "version": numéro de version,
+#         "revision": signal de révision Drive lors du téléchargement, "feuille": clé de la feuille,
+#         "positions": positions des colonnes lues (None si toutes les colonnes sont lues)}.
+# Une lecture limitée à certaines colonnes est gardée sous sa propre clé (voir projection_key).
+# Après un enregistrement, les lignes ajoutées sont diffusées sur le canal et ajoutées en mémoire :
+# les autres sessions les voient sans relire la feuille. Passé CACHE_TTL, on vérifie la révision
+# Drive du fichier : la feuille n'est téléchargée à nouveau que si elle a changé.
+@st.cache_resource
+def _sheet_cache():
+    return {}
+
+
+@st.cache_resource
+def _sheet_cache_lock():
+    """Verrou des mises à jour du cache des feuilles (téléchargement et lignes diffusées)"""
+    return threading.RLock()
+
+
+@st.cache_resource
+def _load_stats():
+    """Compteurs de chargement par feuille : memoire (cache valide), partagee (cache partagé entre réplicas),
+    inchangee (révision identique, téléchargement évité), telechargee, perimee (quota atteint : dernière
+    version servie, ou aucune donnée si la feuille n'a jamais été chargée)"""
+    return defaultdict(Counter)
+
+
+def _apply_new_rows(spreadsheet_key, new_rows):
+    """Abonné du canal : ajoute les lignes enregistrées aux DataFrames partagés de la feuille"""
+    with _sheet_cache_lock():
+        for cache_key, entry in list(_sheet_cache().items()):
+            if entry["feuille"] == spreadsheet_key and len(entry["df"].columns) > 0:
+                _append_rows(cache_key, entry, new_rows)
+
+
+def _append_rows(cache_key, entry, new_rows):
+    df = entry["df"]
+    # Comme dans la feuille, les valeurs sont placées par position (et non par nom de colonne)
+    values = [[_as_cell(v) for v in new_row_dict.values()] for new_row_dict in new_rows]
+    if entry["positions"] is not None:
+        values = [[row[i] if i < len(row) else "" for i in entry["positions"]] for row in values]
+    values = [row[:len(df.columns)] for row in values]
+    new_df = pd.DataFrame(values, columns=df.columns[:max(len(v) for v in values)])
+
+    # Les nouvelles valeurs prennent le type de la colonne existante
+    for col in new_df.columns:
+        if pd.api.types.is_numeric_dtype(df[col]):
             try:
-                df[col] = pd.to_numeric(converted)
-            except (ValueError, AttributeError):
-                # Keep as string if conversion fails
-                df[col] = df[col]
-        
+                new_df[col] = pd.to_numeric(new_df[col].str.replace(',', '.', regex=False))
+            except ValueError:
+                # La colonne n'est plus entièrement numérique : elle repasse en texte, comme à la relecture
+                # (les cellules vides sont relues comme "", pas comme "nan")
+                df = df.assign(**{col: df[col].astype(str).where(df[col].notna(), "")})
+
+    _sheet_cache()[cache_key] = dict(entry, df=pd.concat([df, new_df], ignore_index=True),
+                                     version=entry["version"] + 1)
+
+
+@st.cache_resource
+def get_channel():
+    """Canal de diffusion des enregistrements, partagé par toutes les sessions du processus"""
+    channel = Channel()
+    channel.subscribe(_apply_new_rows)
+    channel.subscribe(_update_completeness)
+    channel.subscribe(_update_running_stats)
+    return channel
+
+
+def sheet_version(url_key):
+    """Numéro de version de la feuille dans le cache partagé du processus (0 si elle n'a pas été lue)"""
+    entry = _sheet_cache().get(url_key)
+    return entry["version"] if entry is not None else 0
+
+
+def cached_version(cache_key, df):
+    """Version en cache de la feuille si df est ce DataFrame en cache, None sinon (lecture impossible :
+    DataFrame vide). Un calcul dérivé n'est gardé en cache que pour une version de la feuille."""
+    entry = _sheet_cache().get(cache_key)
+    return entry["version"] if entry is not None and entry["df"] is df else None
+
+
+def _as_cell(value):
+    """Valeur telle que relue depuis la feuille (texte)"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    return str(value)
+
+
+# --- FONCTION : LECTURE (AVEC CACHE) ---
+def projection_key(url_key, columns=None):
+    """Clé du cache pour une lecture limitée aux colonnes `columns` (toute la feuille si None)"""
+    return url_key if columns is None else f"{url_key}[{', '.join(columns)}]"
+
+
+@st.cache_resource
+def _sheet_headers():
+    """En-têtes de chaque feuille (url -> liste des noms de colonnes), pour les lectures par colonnes"""
+    return {}
+
+
+def download_columns(worksheet, url, columns, skip_rows=0, priority=READ):
+    """Télécharge seulement les colonnes `columns` d'une feuille (en-têtes de la feuille gardés en cache).
+
+    Retourne le DataFrame et la position de ses colonnes dans la feuille. Le quota de la lecture elle-même
+    est déjà réservé par l'appelant ; la lecture des en-têtes est comptée ici.
+    """
+    timed_import("gspread.utils")
+    headers = _sheet_headers().get(url)
+    if headers is None:
+        wait_for_quota(priority, SHEETS_REQUESTS_HEADERS)
+    try:
+        df, positions, _sheet_headers()[url] = read_columns(worksheet, columns, skip_rows, headers)
+    except HeadersChanged:
+        # Les colonnes de la feuille ont changé depuis la lecture des en-têtes : en-têtes et colonnes relus
+        wait_for_quota(priority, SHEETS_REQUESTS_HEADERS + 1)
+        df, positions, _sheet_headers()[url] = read_columns(worksheet, columns, skip_rows)
+    return df, positions
+
+
+def download_sheet(url, skip_rows=0):
+    """Télécharge une feuille et retourne un DataFrame, sans les skip_rows premières lignes de données"""
+    return read_worksheet(get_client().open_by_url(url).sheet1, skip_rows)
+
+
+@st.cache_resource
+def get_shared_cache():
+    """Cache partagé sur disque entre réplicas (shared_cache dans les secrets : chemin du fichier SQLite)"""
+    try:
+        path = st.secrets.get("shared_cache")
+    except Exception:
+        path = None
+    return SharedCache(path, lock_timeout=SHARED_CACHE_LOCK_TIMEOUT) if path else None
+
+
+def _store(cache_key, df, revision, charge_le=None, url_key=None, positions=None, depuis=None):
+    """Place une version de la feuille dans le cache partagé du processus et retourne le DataFrame en cache.
+
+    `depuis` : version de l'entrée au début de la lecture. Si l'entrée a changé entre-temps (lignes diffusées
+    ou lecture d'une autre session), elle est gardée : la version lue ne contient peut-être pas les lignes
+    ajoutées. Si sa révision diffère de celle qui vient d'être lue, elle sera vérifiée à la prochaine lecture.
+    """
+    with _sheet_cache_lock():
+        entry = _sheet_cache().get(cache_key)
+        if depuis is not None and entry is not None and entry["version"] != depuis:
+            if entry["revision"] != revision:
+                entry["charge_le"] = 0
+            return entry["df"]
+
+        _sheet_cache()[cache_key] = {"df": df,
+                                     "charge_le": charge_le if charge_le is not None else time.time(),
+                                     "version": entry["version"] + 1 if entry is not None else 1,
+                                     "revision": revision,
+                                     "feuille": url_key if url_key is not None else cache_key,
+                                     "positions": positions}
         return df
+
+
+def invalidate_sheet(url_key):
+    """Force une nouvelle lecture de la feuille (et de ses lectures par colonnes), même si sa révision
+    Drive n'a pas changé : par exemple après l'archivage de ses premières lignes.
+
+    Les entrées restent en cache, avec une version incrémentée : les calculs dérivés (table Arrow,
+    statistiques, suivi, positions) ne peuvent pas confondre la prochaine lecture avec l'ancienne.
+    """
+    with _sheet_cache_lock():
+        for cache_key, entry in list(_sheet_cache().items()):
+            if entry["feuille"] == url_key:
+                _sheet_cache()[cache_key] = dict(entry, charge_le=0, revision=None, version=entry["version"] + 1)
+    shared = get_shared_cache()
+    if shared is not None:
+        shared.invalidate(url_key)
+
+
+# Résultat d'une lecture de feuille (voir read_sheet)
+CHARGEE = "chargee"
+PERIMEE = "perimee"
+INDISPONIBLE = "indisponible"
+
+
+def read_sheet(url_key, priority=READ, columns=None, cache_only=False):
+    """Lit un Google Sheet à partir de sa clé dans les secrets : retourne (DataFrame, statut).
+
+    statut : CHARGEE, PERIMEE (quota atteint, dernière version chargée retournée) ou INDISPONIBLE (quota
+    atteint et aucune version chargée : DataFrame vide, qui n'est pas gardé en cache). Une lecture de
+    faible priorité (LOW) n'attend jamais le quota. N'affiche rien : c'est à l'appelant de signaler le statut.
+
+    Avec `columns`, seules ces colonnes sont téléchargées (et gardées en cache séparément de la feuille
+    complète). Avec `cache_only`, la version en cache est retournée quel que soit son âge (elle contient les
+    lignes diffusées) : la feuille n'est lue que si elle ne l'a jamais été. Le DataFrame retourné est
+    partagé entre les sessions : il ne doit pas être modifié.
+    """
+    cache_key = projection_key(url_key, columns)
+    stats = _load_stats()[cache_key]
+    entry = _sheet_cache().get(cache_key)
+    if entry is not None and (cache_only or time.time() - entry["charge_le"] < CACHE_TTL):
+        stats["memoire"] += 1
+        return entry["df"], CHARGEE
+    depuis = entry["version"] if entry is not None else 0
+
+    url = st.secrets["connections"]["gsheets"].get(url_key, url_key)
+
+    # Cache partagé entre réplicas : une version récente a peut-être été téléchargée par un autre réplica
+    # (les lectures par colonnes, petites, ne passent pas par ce cache)
+    shared = get_shared_cache() if columns is None else None
+    partage = shared.get(url_key) if shared is not None else None
+    if partage is not None and time.time() - partage["charge_le"] < CACHE_TTL:
+        stats["partagee"] += 1
+        return _store(url_key, partage["df"], partage["revision"], partage["charge_le"], depuis=depuis), CHARGEE
+
+    # Vérification peu coûteuse : si le fichier n'a pas changé, on prolonge le cache
+    revision = get_revision(url)
+    if entry is not None and revision is not None and revision == entry["revision"]:
+        entry["charge_le"] = time.time()
+        stats["inchangee"] += 1
+        return entry["df"], CHARGEE
+    if partage is not None and revision is not None and revision == partage["revision"]:
+        shared.touch(url_key)
+        stats["inchangee"] += 1
+        return _store(url_key, partage["df"], revision, depuis=depuis), CHARGEE
+
+    # Un seul réplica à la fois télécharge la feuille : les autres attendent son résultat
+    owner = None
+    if shared is not None:
+        owner = SharedCache.owner()
+        if not shared.try_lock(url_key, owner):
+            owner = None
+            rafraichie = shared.wait_for_refresh(url_key, since=partage["charge_le"] if partage else 0,
+                                                 timeout=SHARED_CACHE_LOCK_TIMEOUT)
+            if rafraichie is not None:
+                stats["partagee"] += 1
+                return _store(url_key, rafraichie["df"], rafraichie["revision"], rafraichie["charge_le"],
+                              depuis=depuis), CHARGEE
+
+    try:
+        # Quota : une lecture de faible priorité est abandonnée plutôt que mise en attente ; une autre lecture
+        # attend son tour, et sert la dernière version chargée si le délai d'attente expire
+        if priority == LOW:
+            disponible = get_rate_limiter().acquire(LOW, SHEETS_REQUESTS_PER_CALL, blocking=False)
+        else:
+            disponible = get_rate_limiter().acquire(priority, SHEETS_REQUESTS_PER_CALL,
+                                                    timeout=SHEETS_QUEUE_TIMEOUT)
+        if not disponible:
+            stats["perimee"] += 1
+            return (entry["df"], PERIMEE) if entry is not None else (pd.DataFrame(), INDISPONIBLE)
+
+        debut = time.perf_counter()
+        # Les lignes des années archivées ne sont pas relues (sauf la dernière, pour vérification)
+        positions = {}
+        if columns is None:
+            def download(skip_rows):
+                return download_sheet(url, skip_rows=skip_rows)
+        else:
+            worksheet = get_client().open_by_url(url).sheet1
+
+            def download(skip_rows):
+                df, positions["colonnes"] = download_columns(worksheet, url, columns, skip_rows, priority)
+                return df
+        df = read_unarchived(download, get_archive_dir(), url_key, DATE_COLUMNS.get(url_key),
+                             before_reload=lambda: wait_for_quota(priority))
+        positions = positions.get("colonnes")
+        mark_startup(f"1er chargement de la feuille {cache_key}", time.perf_counter() - debut)
+
+        if owner is not None:
+            shared.put(url_key, df, revision)
+    finally:
+        if owner is not None:
+            shared.unlock(url_key, owner)
+
+    stats["telechargee"] += 1
+    return _store(cache_key, df, revision, url_key=url_key, positions=positions, depuis=depuis), CHARGEE
+
+
+def get_df_from_url(url_key, priority=READ, columns=None, cache_only=False):
+    """Comme read_sheet, mais retourne seulement le DataFrame et signale dans la page un quota atteint
+    ou une erreur de lecture (DataFrame vide, non gardé en cache)"""
+    try:
+        df, statut = read_sheet(url_key, priority=priority, columns=columns, cache_only=cache_only)
     except Exception as e:
-        st.error(f"Erreur de lecture ({url_key}): {e}")
+        st.error(f"Erreur de lecture ({projection_key(url_key, columns)}): {e}")
         return pd.DataFrame()
 
+    if statut == PERIMEE:
+        st.caption("Quota de l'API Google atteint : affichage de la dernière version chargée.")
+    elif statut == INDISPONIBLE:
+        st.warning("Quota de l'API Google atteint : les données seront affichées dans quelques instants.")
+    return df
+
 
 # --- FONCTION : SAUVEGARDE ---
 def save_data(spreadsheet_key, new_row_dict):
+    return save_rows(spreadsheet_key, [new_row_dict])
+
+
+def save_rows(spreadsheet_key, new_rows):
+    """Ajoute plusieurs lignes (liste de dictionnaires) au Google Sheet en une seule requête"""
     try:
-        # 1. Configuration des credentials à partir des secrets Streamlit
-        sks = st.secrets["connections"]["gsheets"]
-        
-        credentials_dict = {
-            "type": "service_account",
-            "project_id": sks["project_id"],
-            "private_key_id": sks["private_key_id"],
-            "private_key": sks["private_key"],
-            "client_email": sks["client_email"],
-            "client_id": sks["client_id"],
-            "auth_uri": sks["auth_uri"],
-            "token_uri": "https://oauth2.googleapis.com/token",
-            "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-            "client_x509_cert_url": sks.get("client_x509_cert_url") # optionnel selon votre JSON
-        }
-
-        # 2. Authentification avec gspread
-        scopes = ["https://www.googleapis.com/auth/spreadsheets"]
-        creds = Credentials.from_service_account_info(credentials_dict, scopes=scopes)
-        client = gspread.authorize(creds)
+        # 1. Authentification avec gspread (client partagé, créé au premier accès)
+        client = get_client()
         
-        # 3. Ouverture du fichier et ajout de la ligne
-        url = sks[spreadsheet_key]
+        # 2. Ouverture du fichier et ajout des lignes
+        url = st.secrets["connections"]["gsheets"][spreadsheet_key]
+        wait_for_quota(WRITE)
         sheet = client.open_by_url(url).sheet1
         
-        # Transformer le dictionnaire en liste de valeurs
-        values = list(new_row_dict.values())
+        # Transformer les dictionnaires en listes de valeurs
+        values = [list(new_row_dict.values()) for new_row_dict in new_rows]
         
-        # L'opération magique qui ne supprime rien : append_row
-        sheet.append_row(values)
+        # L'opération magique qui ne supprime rien : append_rows
+        sheet.append_rows(values)
+
+        # La version du cache partagé entre réplicas ne contient pas ces lignes : elle sera relue
+        shared = get_shared_cache()
+        if shared is not None:
+            shared.invalidate(spreadsheet_key)
         
         st.toast("Données enregistrées !", icon="✅")
         
-        # On vide le cache pour que la nouvelle ligne soit visible au prochain affichage
-        st.cache_data.clear()
+        # On diffuse les nouvelles lignes : elles sont ajoutées au cache partagé, sans relire la feuille
+        get_channel().publish(spreadsheet_key, new_rows)
+        return True
         
     except Exception as e:
         st.error(f"Erreur lors de l'enregistrement : {e}")
+        return False
+
+
+# --- FONCTION : REPRÉSENTATION ARROW ---
+# Pour chaque version d'une feuille, sa table Arrow est calculée une seule fois et gardée à côté du
+# DataFrame : st.dataframe la sérialise sans conversion depuis pandas, les 10 dernières lignes en sont
+# une simple vue (slice, sans copie). Les exports sont calculés une fois par version, depuis le DataFrame :
+# le .csv est écrit par pandas, dans le même format que les exports précédents.
+@st.cache_resource
+def _arrow_cache():
+    """clé du cache -> {"version", "df", "table", "exports": {format: contenu du fichier}}"""
+    return {}
+
+
+def get_table(url_key, priority=READ, columns=None, cache_only=False):
+    """Comme get_df_from_url, mais retourne la représentation Arrow de la version en cache de la feuille"""
+    df = get_df_from_url(url_key, priority=priority, columns=columns, cache_only=cache_only)
+    cache_key = projection_key(url_key, columns)
+    version = cached_version(cache_key, df)
+
+    representation = _arrow_cache().get(cache_key)
+    if representation is None or version is None or representation["version"] != version:
+        representation = {"version": version, "df": df, "table": to_arrow(df), "exports": {}}
+        if version is not None:
+            _arrow_cache()[cache_key] = representation
+    return representation
+
+
+def excel_file(df):
+    """Convertit un DataFrame en fichier .xlsx (xlsxwriter n'est chargé qu'au premier export)"""
+    timed_import("xlsxwriter")
+    return to_excel(df)
+
+
+def export_file(representation, file_format):
+    """Contenu du fichier exporté (csv ou xlsx), calculé au premier téléchargement de cette version"""
+    exports = representation["exports"]
+    if file_format not in exports:
+        exports[file_format] = to_csv(representation["df"]) if file_format == "csv" \
+            else excel_file(representation["df"])
+    return exports[file_format]
+
 
 # --- FONCTION : VISUALISATION & TÉLÉCHARGEMENT ---
+# Chaque formulaire et chaque historique est un fragment : une interaction (cocher la case, soumettre
+# un formulaire) ne ré-exécute que ce fragment, pas l'ensemble du script et des quatre onglets.
+# Les historiques ouverts s'actualisent toutes les HISTORY_REFRESH depuis le cache partagé, sans jamais
+# relire la feuille : les lignes enregistrées par d'autres sessions y apparaissent (diffusion) sans
+# requête. La feuille n'est relue qu'à l'ouverture du panneau ou sur demande (bouton « Actualiser »).
+def refresh_requested(panel_key, shown):
+    """Relecture de la feuille demandée : panneau `shown` qui vient d'être ouvert, ou bouton « Actualiser »"""
+    deja_ouvert = st.session_state.get(f"panel_open_{panel_key}", False)
+    st.session_state[f"panel_open_{panel_key}"] = shown
+    if not shown:
+        return False
+    return st.button("🔄 Actualiser", key=f"btn_refresh_{panel_key}") or not deja_ouvert
+
+
+@st.fragment(run_every=HISTORY_REFRESH)
+@profiled
 def show_data(spreadsheet_key, label):
     st.write(f"### Historique : {label}")
     
@@ -106,54 +571,48 @@ def show_data(spreadsheet_key, label):
         f"Afficher/Actualiser le tableau des {label}", 
         key=unique_key
     )
+    actualiser = refresh_requested(unique_key, show_historical_data)
     
     if show_historical_data:
         with st.spinner(f"Chargement des {label}..."):
             try:
-                # Connexion via gspread
-                df = get_df_from_url(spreadsheet_key)
-        
-                if df.empty:
-                    st.info("Aucune donnée enregistrée pour le moment.")
+                # Connexion via gspread (lecture de faible priorité : les enregistrements passent avant)
+                representation = get_table(spreadsheet_key, priority=LOW, cache_only=not actualiser)
+                table = representation["table"]
+
+                if table.num_rows == 0:
+                    # Sans version en cache, la feuille n'a pas pu être lue (message déjà affiché)
+                    if representation["version"] is not None:
+                        st.info("Aucune donnée enregistrée pour le moment.")
                     return
                 col_opts, col_dl_csv, col_dl_excel = st.columns([1, 1, 1])
                 
                 with col_opts:
-                    tout_afficher = st.checkbox(f"Afficher tout l'historique ({len(df)} lignes)", key=f"check_{spreadsheet_key}")
+                    tout_afficher = st.checkbox(f"Afficher tout l'historique ({table.num_rows} lignes)", key=f"check_{spreadsheet_key}")
                 
                 with col_dl_csv:
-                    # Préparation du fichier CSV pour le téléchargement
-                    # on utilise utf-8-sig pour que les accents s'affichent bien dans Excel
-                    csv = df.to_csv(index=False).encode('utf-8-sig')
-        
+                    # Les fichiers ne sont préparés qu'au clic sur le bouton (une fois par version de la feuille)
                     st.download_button(
                         label="📥 Télécharger en format .csv",
-                        data=csv,
+                        data=lambda: export_file(representation, "csv"),
                         file_name=f"export_{label.replace(' ', '_').lower()}_{datetime.now(TIME_ZONE).strftime('%d_%m_%Y')}.csv",
                         mime='text/csv',
                         key=f"btn_{spreadsheet_key}_csv"
                     )
         
                 with col_dl_excel:
-                    buffer = io.BytesIO()
-        
-                    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-                        df.to_excel(writer, index=False)
-                        # -> UserWarning: Calling close() on already closed file.
-                        # MAIS, retirer writer.close() produit des fichiers excels corrompus.
-                        writer.close()
-                        st.download_button(
-                            label="📥 Télécharger en format .xlsx",
-                            data=buffer,
-                            file_name=f"export_{label.replace(' ', '_').lower()}_{datetime.now(TIME_ZONE).strftime('%d_%m_%Y')}.xlsx",
-                            mime='application/vnd.ms-excel',
-                            key = f"btn_{spreadsheet_key}_excel"
-                        )
+                    st.download_button(
+                        label="📥 Télécharger en format .xlsx",
+                        data=lambda: export_file(representation, "xlsx"),
+                        file_name=f"export_{label.replace(' ', '_').lower()}_{datetime.now(TIME_ZONE).strftime('%d_%m_%Y')}.xlsx",
+                        mime='application/vnd.ms-excel',
+                        key = f"btn_{spreadsheet_key}_excel"
+                    )
         
                 if tout_afficher:
-                    st.dataframe(df, width="stretch")
+                    st.dataframe(table, width="stretch")
                 else:
-                    st.dataframe(df.tail(10), width="stretch")
+                    st.dataframe(table.slice(max(table.num_rows - 10, 0)), width="stretch")
                     st.caption("Affichage des 10 dernières entrées.")
                     
             except Exception as e:
@@ -162,20 +621,766 @@ def show_data(spreadsheet_key, label):
         st.info("Cochez la case ci-dessus pour afficher les données encodées.")
 
 
+# --- FONCTION : IMPORT EN MASSE (FICHIERS DES APPAREILS) ---
+TRAITEMENTS = ["Lumière", "Ombre"]
+
+# Champs de chaque table, dans l'ordre des dictionnaires new_row des formulaires, avec les mêmes règles
+# (champs obligatoires, bornes min/max). "alias" : autres noms de colonne possibles dans les exports.
+IMPORT_FIELDS = {
+    "url_irga": {
+        "date": {"type": "date", "obligatoire": True},
+        "heure": {"type": "heure", "obligatoire": True, "alias": ["time"]},
+        "plante_ID": {"type": "entier", "obligatoire": True, "min": 1, "max": 20, "alias": ["plante", "id"]},
+        "rang_f": {"type": "entier", "obligatoire": True, "min": 1, "max": 20, "alias": ["rang", "feuille"]},
+        "CO2_in": {"type": "nombre", "obligatoire": True, "alias": ["cref", "co2ref"]},
+        "CO2_out": {"type": "nombre", "obligatoire": True, "alias": ["can", "co2an"]},
+        "H2O_in": {"type": "nombre", "obligatoire": True, "alias": ["eref", "h2oref"]},
+        "H2O_out": {"type": "nombre", "obligatoire": True, "alias": ["ean", "h2oan"]},
+        "PAR": {"type": "nombre", "obligatoire": True, "alias": ["qleaf"]},
+        "pression": {"type": "nombre", "obligatoire": True, "alias": ["patm", "p"]},
+        "temp": {"type": "nombre", "obligatoire": True, "alias": ["tch", "tleaf"]},
+        "flux_air": {"type": "nombre", "obligatoire": True, "alias": ["u", "flow"]},
+        "A": {"type": "nombre", "obligatoire": True},
+        "E": {"type": "nombre", "obligatoire": True},
+        "traitement": {"type": "choix", "obligatoire": True, "choix": TRAITEMENTS},
+        "remarque": {"type": "texte", "obligatoire": False},
+    },
+    "url_fluo": {
+        "date": {"type": "date", "obligatoire": True},
+        "heure": {"type": "heure", "obligatoire": True, "alias": ["time"]},
+        "plante_ID": {"type": "entier", "obligatoire": True, "min": 1, "max": 20, "alias": ["plante", "id"]},
+        "rang_f": {"type": "entier", "obligatoire": True, "min": 1, "max": 20, "alias": ["rang", "feuille"]},
+        "traitement": {"type": "choix", "obligatoire": True, "choix": TRAITEMENTS},
+        "Y_II": {"type": "nombre", "obligatoire": True, "alias": ["yii", "y(ii)"]},
+        "act_PAR": {"type": "nombre", "obligatoire": False, "alias": ["par", "actinicpar"]},
+        "remarque": {"type": "texte", "obligatoire": False},
+    },
+    "url_chloro": {
+        "date": {"type": "date", "obligatoire": True},
+        "heure": {"type": "heure", "obligatoire": True, "alias": ["time"]},
+        "plante_ID": {"type": "entier", "obligatoire": True, "min": 1, "max": 20, "alias": ["plante", "id"]},
+        "rang_f": {"type": "entier", "obligatoire": True, "min": 1, "max": 20, "alias": ["rang", "feuille"]},
+        "traitement": {"type": "choix", "obligatoire": True, "choix": TRAITEMENTS},
+        "appareil": {"type": "choix", "obligatoire": True, "choix": ["Neuf", "Vieux"]},
+        "CCI": {"type": "nombre", "obligatoire": True, "alias": ["cci", "chlorophyllcontentindex"]},
+        "PAR": {"type": "nombre", "obligatoire": True},
+    },
+}
+
+
+def _normalize_name(name):
+    return "".join(c for c in str(name).lower() if c.isalnum())
+
+
+def guess_column(field, regle, columns):
+    """Retourne la position de la colonne du fichier qui correspond le mieux au champ (ou None)"""
+    candidats = [_normalize_name(field)] + [_normalize_name(a) for a in regle.get("alias", [])]
+    normalized = [_normalize_name(c) for c in columns]
+    for candidat in candidats:
+        if candidat in normalized:
+            return normalized.index(candidat)
+    return None
+
+
+def read_upload(fichier):
+    """Lit un fichier .csv ou .xlsx exporté par un appareil, toutes les valeurs sous forme de texte"""
+    if fichier.name.lower().endswith(".xlsx"):
+        raw = pd.read_excel(fichier, dtype=str)
+    else:
+        # Le séparateur (virgule, point-virgule, tabulation) est détecté automatiquement
+        raw = pd.read_csv(fichier, dtype=str, sep=None, engine="python", encoding="utf-8-sig")
+    raw = raw.fillna("").apply(lambda col: col.str.strip())
+    # Les lignes entièrement vides (fin de fichier) sont ignorées
+    return raw[(raw != "").any(axis=1)]
+
+
+def validate_rows(raw, mapping, fields):
+    """Valide toutes les lignes d'un coup selon les règles des formulaires.
+
+    Retourne un DataFrame avec les champs convertis (dans l'ordre de fields) et une colonne "erreurs"
+    (chaîne vide si la ligne est valide).
+    """
+    checked = pd.DataFrame(index=raw.index)
+    erreurs = pd.Series("", index=raw.index)
+
+    def add_error(mask, message):
+        nonlocal erreurs
+        erreurs = erreurs.mask(mask, erreurs + message + " ; ")
+
+    for field, regle in fields.items():
+        colonne = mapping.get(field)
+        valeurs = raw[colonne] if colonne is not None else pd.Series("", index=raw.index)
+        vide = valeurs == ""
+
+        if regle["obligatoire"]:
+            add_error(vide, f"{field} manquant")
+
+        if regle["type"] in ("nombre", "entier"):
+            nombres = pd.to_numeric(valeurs.str.replace(',', '.', regex=False), errors="coerce")
+            add_error(~vide & nombres.isna(), f"{field} n'est pas un nombre")
+            if "min" in regle:
+                add_error(nombres < regle["min"], f"{field} < {regle['min']}")
+            if "max" in regle:
+                add_error(nombres > regle["max"], f"{field} > {regle['max']}")
+            if regle["type"] == "entier":
+                add_error(nombres.notna() & (nombres % 1 != 0), f"{field} n'est pas un entier")
+                nombres = nombres.where(nombres % 1 == 0).astype("Int64")
+            checked[field] = nombres
+        elif regle["type"] == "date":
+            dates = pd.to_datetime(valeurs, format="%d/%m/%Y", errors="coerce")
+            dates = dates.fillna(pd.to_datetime(valeurs, format="%Y-%m-%d", errors="coerce"))
+            add_error(~vide & dates.isna(), f"{field} invalide (JJ/MM/AAAA)")
+            checked[field] = dates.dt.strftime("%d/%m/%Y")
+        elif regle["type"] == "heure":
+            heures = pd.to_datetime(valeurs, format="%H:%M", errors="coerce")
+            heures = heures.fillna(pd.to_datetime(valeurs, format="%H:%M:%S", errors="coerce"))
+            add_error(~vide & heures.isna(), f"{field} invalide (HH:MM)")
+            checked[field] = heures.dt.strftime("%H:%M")
+        elif regle["type"] == "choix":
+            add_error(~vide & ~valeurs.isin(regle["choix"]), f"{field} doit être parmi {', '.join(regle['choix'])}")
+            checked[field] = valeurs
+        else:
+            checked[field] = valeurs
+
+    checked["erreurs"] = erreurs.str.rstrip(" ;")
+    return checked
+
+
+def to_rows(checked, fields):
+    """Convertit les lignes validées en dictionnaires new_row (valeurs Python, None si vide)"""
+    values = checked[list(fields)].astype(object)
+    values = values.where(values.notna(), None)
+    return values.to_dict("records")
+
+
+@st.fragment
+@profiled
+def bulk_import(spreadsheet_key, label):
+    fields = IMPORT_FIELDS[spreadsheet_key]
+
+    # Après un enregistrement, le sélecteur de fichier est vidé (nouvelle clé) et l'empreinte du fichier est
+    # gardée : un second clic ou un nouvel envoi du même fichier n'ajoute pas les lignes une deuxième fois
+    envois = st.session_state.setdefault(f"upload_count_{spreadsheet_key}", 0)
+    importes = st.session_state.setdefault(f"upload_hashes_{spreadsheet_key}", {})
+
+    with st.expander(f"📤 Importer un fichier exporté par l'appareil ({label})"):
+        fichier = st.file_uploader("Fichier .csv ou .xlsx", type=["csv", "xlsx"],
+                                   key=f"upload_{spreadsheet_key}_{envois}")
+
+        if fichier is None:
+            st.caption("Les colonnes du fichier sont associées aux champs du formulaire ; toutes les lignes sont "
+                       "vérifiées avec les mêmes règles que le formulaire avant l'enregistrement.")
+            return
+
+        empreinte = hashlib.sha256(fichier.getvalue()).hexdigest()
+        if empreinte in importes:
+            st.warning(f"Ce fichier a déjà été importé ({importes[empreinte]}) : ses lignes ne sont pas "
+                       "enregistrées une deuxième fois.")
+            return
+
+        try:
+            raw = read_upload(fichier)
+        except Exception as e:
+            st.warning(f"Impossible de lire le fichier. Erreur: {e}")
+            return
+
+        st.write("##### Correspondance des colonnes")
+        columns = list(raw.columns)
+        mapping = {}
+        grid = st.columns(4)
+        for i, (field, regle) in enumerate(fields.items()):
+            with grid[i % 4]:
+                mapping[field] = st.selectbox(field + (" *" if regle["obligatoire"] else ""), columns,
+                                              index=guess_column(field, regle, columns),
+                                              key=f"map_{spreadsheet_key}_{field}")
+
+        manquants = [field for field, regle in fields.items() if regle["obligatoire"] and mapping[field] is None]
+        if manquants:
+            st.error(f"{MANDATORY_FIELDS_MISSING} ({', '.join(manquants)})")
+            return
+
+        checked = validate_rows(raw, mapping, fields)
+        valides = checked["erreurs"] == ""
+
+        st.write(f"**{valides.sum()}** ligne(s) valide(s) sur {len(checked)}.")
+
+        if not valides.all():
+            erreurs = checked.loc[~valides, ["erreurs"]]
+            # Numéro de ligne tel qu'affiché dans un tableur (ligne 1 = en-têtes)
+            erreurs.index = erreurs.index + 2
+            st.dataframe(erreurs, width="stretch")
+
+        if st.button(f"Enregistrer les {valides.sum()} ligne(s) valide(s)", disabled=not valides.any(),
+                     key=f"btn_import_{spreadsheet_key}"):
+            if save_rows(spreadsheet_key, to_rows(checked[valides], fields)):
+                importes[empreinte] = f"{fichier.name}, {valides.sum()} ligne(s)"
+                # Le sélecteur de fichier est vidé à la prochaine exécution du fragment
+                st.session_state[f"upload_count_{spreadsheet_key}"] = envois + 1
+
+
+# --- FONCTION : SUIVI DES OBSERVATIONS DES TOURNESOLS ---
+TOURNESOL_SHEETS = (INSCRIPTION, OBS_PLANTE, PIECE, OBS_FEUILLE)
+
+
+def debut_quadrimestre():
+    """Lundi de la semaine S1 du quadrimestre (debut_quadrimestre dans les secrets, au format AAAA-MM-JJ).
+
+    Par défaut, le 2ème lundi de février de l'année académique en cours.
+    """
+    try:
+        debut = st.secrets.get("debut_quadrimestre")
+    except Exception:
+        debut = None
+    if debut:
+        return pd.Timestamp(debut)
+
+    return default_term_start(datetime.now(TIME_ZONE))
+
+
+def current_week():
+    return int(week_of([datetime.now(TIME_ZONE).strftime("%d/%m/%Y")], debut_quadrimestre()).iloc[0])
+
+
+@st.cache_resource
+def _completeness():
+    """Suivi partagé par toutes les sessions, avec les versions des feuilles dont il est issu"""
+    return {"tracker": None, "versions": None}
+
+
+def _update_completeness(spreadsheet_key, new_rows):
+    """Abonné du canal : ajoute les lignes enregistrées au suivi, sans le recalculer"""
+    state = _completeness()
+    if state["tracker"] is None or spreadsheet_key not in TOURNESOL_SHEETS:
+        return
+
+    # Le suivi doit correspondre aux feuilles juste avant cet ajout (sinon il sera recalculé)
+    versions = tuple(sheet_version(key) for key in TOURNESOL_SHEETS)
+    attendues = tuple(v + (key == spreadsheet_key) for key, v in zip(TOURNESOL_SHEETS, state["versions"]))
+    if versions != attendues:
+        return
+
+    tracker = state["tracker"]
+    new_df = pd.DataFrame(new_rows)
+    {INSCRIPTION: tracker.add_inscriptions,
+     OBS_PLANTE: tracker.add_observations,
+     PIECE: tracker.add_pieces,
+     OBS_FEUILLE: tracker.add_leaves}[spreadsheet_key](new_df)
+    state["versions"] = versions
+
+
+def get_completeness():
+    """Suivi des observations, recalculé seulement si une feuille a été relue depuis"""
+    frames = [get_df_from_url(key) for key in TOURNESOL_SHEETS]
+    versions = tuple(cached_version(key, df) for key, df in zip(TOURNESOL_SHEETS, frames))
+
+    debut = debut_quadrimestre()
+    if None in versions:
+        # Une feuille n'a pas pu être lue : le suivi n'est pas gardé en cache
+        return CompletenessTracker.from_frames(debut, *frames)
+    state = _completeness()
+    if state["tracker"] is None or state["versions"] != versions or state["tracker"].debut != debut:
+        state["tracker"] = CompletenessTracker.from_frames(debut, *frames)
+        state["versions"] = versions
+    return state["tracker"]
+
+
+@st.fragment
+@profiled
+def show_completeness():
+    st.write("### Suivi des observations des tournesols")
+
+    semaine = current_week()
+    tracker = get_completeness()
+    summary = tracker.summary(semaine)
+
+    if summary.empty:
+        st.info("Aucun tournesol inscrit pour le moment.")
+        return
+
+    st.caption(f"Semaine en cours : S{semaine}. {MISSING} : observation attendue mais manquante. Les observations "
+               f"des feuilles ne sont attendues qu'à partir de S11.")
+
+    left, middle, right = st.columns(3)
+    left.metric("Tournesols avec des semaines manquantes", int((summary["semaines_manquantes"] > 0).sum()))
+    middle.metric("Pièces non caractérisées", int((~summary["piece"]).sum()))
+    right.metric("Feuilles non encodées", int((summary["feuilles"] == False).sum()))
+
+    seulement_incomplets = st.checkbox("Afficher uniquement les tournesols incomplets", value=True)
+    tableau = summary.join(tracker.matrix(semaine))
+    if seulement_incomplets:
+        incomplets = (summary["semaines_manquantes"] > 0) | ~summary["piece"] | (summary["feuilles"] == False)
+        tableau = tableau[incomplets]
+
+    st.dataframe(tableau, width="stretch")
+    st.download_button(
+        label="📥 Télécharger en format .csv",
+        data=tableau.to_csv().encode('utf-8-sig'),
+        file_name=f"suivi_tournesols_{datetime.now(TIME_ZONE).strftime('%d_%m_%Y')}.csv",
+        mime='text/csv',
+        key="btn_suivi_csv"
+    )
+
+
+@st.fragment
+@profiled
+def show_student_completeness():
+    # Le suivi lit quatre feuilles : il n'est calculé que lorsque la section est ouverte
+    with st.expander("📋 Où en sont mes encodages ?", key="section_suivi_encodages",
+                     on_change="rerun") as section:
+        if not section.open:
+            return
+        tracker = get_completeness()
+        plante_ID = st.selectbox("ID du tournesol", tracker.plants.index, index=None, key="suivi_plante_ID")
+        if plante_ID is None:
+            return
+
+        semaine = current_week()
+        summary = tracker.summary(semaine).loc[plante_ID]
+        st.dataframe(tracker.matrix(semaine).loc[[plante_ID]], width="stretch")
+
+        if summary["semaines_manquantes"] > 0:
+            st.warning(f"Il manque {summary['semaines_manquantes']} semaine(s) d'observation de la plante entière.")
+        else:
+            st.success("Toutes les observations hebdomadaires attendues sont encodées.")
+
+        if not summary["piece"]:
+            st.warning("Les caractéristiques de votre pièce ne sont pas encore encodées.")
+        if summary["feuilles"] is not pd.NA and not summary["feuilles"]:
+            st.warning("Les observations des feuilles ne sont pas encore encodées.")
+
+
+# --- FONCTION : COMPARAISON LUMIÈRE / OMBRE EN DIRECT ---
+# Variables comparées entre traitements pour chaque appareil du TP5
+LIVE_STATS = {
+    "url_irga": ["A", "E"],
+    "url_poro": ["cond"],
+    "url_fluo": ["Y_II"],
+    "url_chloro": ["CCI"],
+}
+LIVE_STATS_GROUPS = ["traitement", "rang_f"]
+
+
+@st.cache_resource
+def _running_stats():
+    """Statistiques par feuille, partagées par toutes les sessions : {clé: {"stats", "version"}}"""
+    return {}
+
+
+def _update_running_stats(spreadsheet_key, new_rows):
+    """Abonné du canal : ajoute les lignes enregistrées aux statistiques, sans relire la feuille"""
+    entry = _running_stats().get(spreadsheet_key)
+    # Les statistiques doivent correspondre à la feuille juste avant cet ajout (sinon elles seront recalculées)
+    if entry is None or sheet_version(spreadsheet_key) != entry["version"] + 1:
+        return
+    entry["stats"].add(pd.DataFrame(new_rows))
+    entry["version"] += 1
+
+
+def get_running_stats(spreadsheet_key, priority=READ, cache_only=False):
+    """Statistiques de la feuille ({"stats", "version"}), recalculées entièrement seulement quand elle a été
+    relue. Si la feuille n'a pas pu être lue, version vaut None et les statistiques ne sont pas gardées."""
+    df = get_df_from_url(spreadsheet_key, priority=priority, cache_only=cache_only)
+    version = cached_version(spreadsheet_key, df)
+
+    entry = _running_stats().get(spreadsheet_key)
+    if entry is None or version is None or entry["version"] != version:
+        entry = {"stats": RunningStats.from_frame(df, LIVE_STATS[spreadsheet_key], LIVE_STATS_GROUPS),
+                 "version": version}
+        if version is not None:
+            _running_stats()[spreadsheet_key] = entry
+    return entry
+
+
+@st.fragment(run_every=HISTORY_REFRESH)
+@profiled
+def show_comparison(spreadsheet_key, label):
+    st.write(f"### Comparaison Lumière / Ombre : {label}")
+
+    afficher = st.checkbox("Afficher la comparaison en direct", key=f"check_stats_{spreadsheet_key}")
+    actualiser = refresh_requested(f"stats_{spreadsheet_key}", afficher)
+    if not afficher:
+        return
+
+    # Les actualisations automatiques ne lisent que le cache (statistiques mises à jour par diffusion)
+    entry = get_running_stats(spreadsheet_key, priority=LOW, cache_only=not actualiser)
+    stats = entry["stats"]
+
+    col_var, col_rang = st.columns(2)
+    with col_var:
+        variable = st.selectbox("Variable", LIVE_STATS[spreadsheet_key], key=f"stats_var_{spreadsheet_key}")
+    with col_rang:
+        par_rang = st.checkbox("Détailler par rang de feuille", key=f"stats_rang_{spreadsheet_key}")
+
+    summary = stats.summary(variable, LIVE_STATS_GROUPS if par_rang else ["traitement"])
+    if summary.empty:
+        # Sans version en cache, la feuille n'a pas pu être lue (message déjà affiché)
+        if entry["version"] is not None:
+            st.info("Aucune mesure enregistrée pour le moment.")
+        return
+
+    if par_rang:
+        st.bar_chart(summary, x="rang_f", y="moyenne", color="traitement", stack=False,
+                     x_label="Rang de la feuille", y_label=f"{variable} (moyenne)")
+    else:
+        st.bar_chart(summary, x="traitement", y="moyenne", color="traitement",
+                     x_label="Traitement", y_label=f"{variable} (moyenne)")
+    st.dataframe(summary, hide_index=True, width="stretch")
+
+
+# --- FONCTION : CARTE DES PIÈCES ---
+# Distance (en mètres) de proche en proche en dessous de laquelle des pièces sont regroupées sur la carte :
+# un groupe est une chaîne de pièces voisines, il peut donc s'étendre sur plus de CLUSTER_RADIUS
+CLUSTER_RADIUS = 200
+
+# Couleur des points selon la température de la pièce (couleurs de la légende Streamlit)
+TEMP_COLORS = {
+    "Chaude (> 21 °C)": "#ff4b4b",
+    "Moyenne (19-21 °C)": "#ffa421",
+    "Fraîche (17-19 °C)": "#1c83e1",
+    "Froide (< 17 °C)": "#803df5",
+}
+DEFAULT_COLOR = "#808495"
+MAP_LEGEND = ":red[● chaude] :orange[● moyenne] :blue[● fraîche] :violet[● froide] :gray[● non indiquée]"
+
+
+@st.cache_resource
+def _piece_positions():
+    """Coordonnées des pièces, partagées par toutes les sessions : {"version", "points", "groupes"}"""
+    return {"version": None, "points": None, "groupes": None}
+
+
+def get_positions(priority=READ):
+    """Coordonnées des pièces et groupes de pièces proches, recalculés seulement quand la feuille change"""
+    df = get_df_from_url(PIECE, priority=priority)
+    version = cached_version(PIECE, df)
+
+    state = _piece_positions()
+    if version is None or state["version"] != version:
+        columns = [col for col in ["plante_ID", "orientation", "temp", "position"] if col in df.columns]
+        positions = df["position"] if "position" in df.columns else pd.Series(pd.NA, index=df.index)
+        points = df[columns].join(parse_positions(positions))
+        points["groupe"] = cluster_positions(points["lat"], points["lon"], CLUSTER_RADIUS)
+        temp = points["temp"] if "temp" in points.columns else pd.Series(pd.NA, index=points.index)
+        points["couleur"] = temp.map(TEMP_COLORS).fillna(DEFAULT_COLOR)
+
+        if version is None:
+            # La feuille n'a pas pu être lue : les positions ne sont pas gardées en cache
+            return points, summarize_clusters(points)
+        state["points"] = points
+        state["groupes"] = summarize_clusters(points)
+        state["version"] = version
+    return state["points"], state["groupes"]
+
+
+@st.fragment
+@profiled
+def show_rooms_map():
+    st.write("### Carte des pièces")
+
+    if not st.checkbox("Afficher la carte des pièces", key="check_map_piece"):
+        return
+
+    points, groupes = get_positions(priority=LOW)
+    invalides = points[~points["position_valide"]]
+    if len(invalides):
+        with st.expander(f"⚠️ {len(invalides)} position(s) GPS illisible(s)"):
+            st.dataframe(invalides[[col for col in ["plante_ID", "position"] if col in invalides.columns]],
+                         hide_index=True)
+
+    if groupes.empty:
+        st.info("Aucune position valide enregistrée pour le moment.")
+        return
+
+    st.caption(f"Température de la pièce : {MAP_LEGEND}")
+
+    regrouper = st.toggle(f"Regrouper les pièces voisines (de proche en proche, moins de {CLUSTER_RADIUS} m)", value=True, key="toggle_map_groupes")
+    if regrouper:
+        groupes = groupes.assign(couleur=groupes["temp"].map(TEMP_COLORS).fillna(DEFAULT_COLOR),
+                                 taille=30 + 20 * groupes["pieces"])
+        st.map(groupes, latitude="lat", longitude="lon", color="couleur", size="taille")
+        st.dataframe(groupes.drop(columns=["couleur", "taille"]), hide_index=True, width="stretch")
+    else:
+        st.map(points[points["position_valide"]], latitude="lat", longitude="lon", color="couleur", size=30)
+
+
+# --- FONCTION : EXPORT GLOBAL ---
+def write_export_archive(fileobj, datasets=DATASETS):
+    """Écrit toutes les tables dans une archive ZIP : un .csv par table et un .xlsx avec une feuille par table.
+
+    Les tables sont écrites l'une après l'autre, bloc par bloc : le .csv est compressé directement dans
+    l'archive et le .xlsx est écrit en mode "constant_memory" de xlsxwriter (une seule ligne en mémoire),
+    dans un fichier temporaire. L'archive elle-même est écrite dans fileobj (un fichier sur disque).
+
+    Les messages de la page ne s'affichent pas pendant la préparation du téléchargement : les tables qui n'ont
+    pas pu être lues (ou seulement dans une version ancienne) sont listées dans le fichier EXPORT_REPORT.
+    """
+    xlsxwriter = timed_import("xlsxwriter")
+    manquantes = {}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path = os.path.join(tmp_dir, "export.xlsx")
+        workbook = xlsxwriter.Workbook(xlsx_path, {"constant_memory": True, "tmpdir": tmp_dir})
+
+        with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for key in datasets:
+                # DataFrame du cache partagé (sans copie) : ni table Arrow ni fichier complet en mémoire
+                try:
+                    df, statut = read_sheet(key)
+                except Exception as e:
+                    manquantes[key] = f"erreur de lecture : {e}"
+                    continue
+                if statut == INDISPONIBLE:
+                    manquantes[key] = "quota de l'API Google atteint"
+                    continue
+                if statut == PERIMEE:
+                    manquantes[key] = "exportée dans sa dernière version chargée (quota de l'API Google atteint)"
+                if len(df.columns) == 0:
+                    manquantes.setdefault(key, "feuille vide")
+                    continue
+
+                worksheet = workbook.add_worksheet(key[:31])
+                worksheet.write_row(0, 0, list(df.columns))
+                ligne = 1
+
+                # on utilise utf-8-sig pour que les accents s'affichent bien dans Excel
+                with archive.open(f"{key}.csv", "w") as csv_file, \
+                        io.TextIOWrapper(csv_file, encoding="utf-8-sig", newline="") as csv_text:
+                    df.head(0).to_csv(csv_text, index=False)
+
+                    for chunk in iter_chunks(df, EXPORT_CHUNK_ROWS):
+                        chunk.to_csv(csv_text, index=False, header=False)
+
+                        # En mode constant_memory, les lignes doivent être écrites dans l'ordre
+                        for row in chunk.itertuples(index=False, name=None):
+                            worksheet.write_row(ligne, 0, [None if pd.isna(v) else v for v in row])
+                            ligne += 1
+
+            workbook.close()
+            archive.write(xlsx_path, arcname=f"export_complet_{datetime.now(TIME_ZONE).strftime('%d_%m_%Y')}.xlsx")
+
+            if manquantes:
+                archive.writestr(EXPORT_REPORT, "".join(f"{key} : {raison}\n" for key, raison in manquantes.items()))
+
+
+def export_archive():
+    """Contenu de l'archive .zip, préparé seulement au clic sur le bouton de téléchargement.
+
+    L'archive est écrite dans un fichier temporaire ; seul le fichier compressé est relu pour être servi.
+    """
+    with tempfile.TemporaryFile() as archive:
+        write_export_archive(archive)
+        archive.seek(0)
+        return archive.read()
+
+
+@st.fragment
+@profiled
+def export_all():
+    st.write("### Export de toutes les données")
+
+    st.caption(f"Archive .zip contenant les {len(DATASETS)} tables (un fichier .csv par table et un fichier "
+               ".xlsx avec une feuille par table), préparée au clic sur le bouton. Les tables qui n'ont pas pu "
+               f"être lues sont listées dans le fichier {EXPORT_REPORT} de l'archive.")
+
+    # Le bouton reste affiché d'une exécution à l'autre ; le clic ne relance pas le script
+    st.download_button(
+        label="📥 Télécharger l'archive .zip",
+        data=export_archive,
+        file_name=f"export_complet_{datetime.now(TIME_ZONE).strftime('%d_%m_%Y')}.zip",
+        mime='application/zip',
+        on_click="ignore",
+        key="btn_export_all"
+    )
+
+
+# --- FONCTION : INSTRUMENTATION (ADMINISTRATEURS) ---
+def is_admin():
+    """Mode administrateur : ?admin=<jeton> dans l'URL, le jeton étant défini dans les secrets (admin_token)"""
+    try:
+        token = st.secrets.get("admin_token")
+    except Exception:
+        return False
+    # compare_digest n'accepte que des chaînes ASCII : on compare les octets (jeton quelconque dans l'URL)
+    return token is not None and hmac.compare_digest(st.query_params.get("admin", "").encode("utf-8"),
+                                                     str(token).encode("utf-8"))
+
+
+def profiling_enabled():
+    """Profilage des exécutions : administrateurs avec ?profile dans l'URL, ou profiling = true dans les secrets"""
+    if not is_admin():
+        return False
+    try:
+        return "profile" in st.query_params or bool(st.secrets.get("profiling", False))
+    except Exception:
+        return False
+
+
+def profiles_dir():
+    try:
+        return st.secrets.get("profiles_dir", os.path.join(tempfile.gettempdir(), "tp_physio_profiles"))
+    except Exception:
+        return os.path.join(tempfile.gettempdir(), "tp_physio_profiles")
+
+
+def get_archive_dir():
+    """Dossier des archives Parquet (voir sheets.archive_dir)"""
+    try:
+        return archive_dir(st.secrets)
+    except Exception:
+        return archive_dir({})
+
+
+def start_profiling():
+    """Démarre le profilage de l'exécution en cours du script"""
+    # Si l'exécution précédente a été interrompue (nouvelle interaction), son profil est abandonné
+    precedent = st.session_state.pop("_profiler", None)
+    if precedent is not None:
+        precedent.stop()
+
+    profiler = SamplingProfiler(root_filename=os.path.abspath(__file__)).start()
+    st.session_state["_profiler"] = profiler
+    return profiler
+
+
+def stop_profiling(profiler):
+    """Arrête le profilage et enregistre le profil (format "collapsed stacks" pour flame graph)"""
+    st.session_state.pop("_profiler", None)
+    samples = profiler.stop()
+    if samples:
+        save_profile(profiles_dir(), samples, profiler.duration, PROFILES_KEEP)
+
+
+def archive_year(year):
+    """Archive, pour chaque table datée, les lignes des années académiques <= year pas encore archivées"""
+    resultats = {}
+    for key in [key for key in DATASETS if DATE_COLUMNS[key] is not None]:
+        wait_for_quota(READ)
+        df = download_sheet(st.secrets["connections"]["gsheets"].get(key, key))
+        try:
+            resultats[DATASETS[key]] = archive_rows(get_archive_dir(), key, df, DATE_COLUMNS[key], year)
+        except ValueError as e:
+            resultats[DATASETS[key]] = f"non archivée : {e}"
+            continue
+        invalidate_sheet(key)
+    return resultats
+
+
+@st.fragment
+@profiled
+def show_archives():
+    st.write("### Archives des années précédentes")
+
+    left, right = st.columns(2)
+
+    with left:
+        st.write("##### Archiver une année")
+        debut = int(current_academic_year(datetime.now(TIME_ZONE))[:4])
+        annee = st.selectbox("Année académique à archiver (et années antérieures)",
+                             [f"{y}-{y + 1}" for y in range(debut - 1, debut - 6, -1)])
+        st.caption("Les lignes archivées ne sont plus chargées par l'application mais restent dans les Google Sheets. "
+                   "Les tables sans date (pièces, évaluations par les pairs) ne sont pas archivées.")
+
+        if st.button("Archiver"):
+            with st.spinner("Archivage..."):
+                try:
+                    st.dataframe(pd.Series(archive_year(annee), name="lignes archivées"), width="stretch")
+                except Exception as e:
+                    st.warning(f"Impossible d'archiver {annee}. Erreur: {e}")
+
+    with right:
+        st.write("##### Consulter les archives")
+        archives = list_archives(get_archive_dir())
+        if not archives:
+            st.info("Aucune archive pour le moment.")
+            return
+
+        key = st.selectbox("Table", list(archives), format_func=lambda k: DATASETS.get(k, k))
+        annee_archive = st.selectbox("Année académique", archives[key], index=len(archives[key]) - 1)
+
+    df = read_archive(get_archive_dir(), key, annee_archive)
+    st.dataframe(df, width="stretch")
+    st.download_button(
+        label="📥 Télécharger en format .csv",
+        data=df.to_csv(index=False).encode('utf-8-sig'),
+        file_name=f"archive_{key}_{annee_archive}.csv",
+        mime='text/csv',
+        key="btn_archive_csv"
+    )
+
+
+def show_admin():
+    st.header(HEADER_ADMIN)
+
+    st.write("### Chargement des feuilles")
+    stats = pd.DataFrame.from_dict(dict(_load_stats()), orient="index").fillna(0).astype(int)
+    if stats.empty:
+        st.caption("Aucune feuille chargée pour le moment.")
+    else:
+        st.dataframe(stats, width="stretch")
+
+    st.write("### Démarrage à froid")
+    st.code(startup_report(), language=None)
+
+    show_completeness()
+
+    show_archives()
+
+    st.write("### Profils des exécutions")
+    st.caption(f"Ajoutez `&profile` à l'URL pour profiler chaque exécution du script et chaque ré-exécution d'un "
+               f"fragment (formulaire, historique). Les {PROFILES_KEEP} derniers "
+               "profils sont gardés au format \"collapsed stacks\" (flamegraph.pl, speedscope.app).")
+
+    profiles = list_profiles(profiles_dir())
+    if not profiles:
+        st.info("Aucun profil enregistré.")
+        return
+
+    st.dataframe(pd.DataFrame(profiles)[["date", "duree_ms", "execution", "nom"]], width="stretch", hide_index=True)
+
+    nom = st.selectbox("Profil", [p["nom"] for p in profiles])
+    profile = next(p for p in profiles if p["nom"] == nom)
+    samples = read_profile(profile["path"])
+
+    left, right = st.columns(2)
+    with left:
+        st.write("##### Lignes de app.py les plus coûteuses")
+        st.dataframe(pd.DataFrame(top_frames(samples, filename="app.py"), columns=["ligne", "échantillons"]),
+                     width="stretch", hide_index=True)
+    with right:
+        st.write("##### Fonctions les plus coûteuses")
+        st.dataframe(pd.DataFrame(top_frames(samples, by_function=True), columns=["fonction", "échantillons"]),
+                     width="stretch", hide_index=True)
+
+    with open(profile["path"], "rb") as f:
+        st.download_button("📥 Télécharger le profil", data=f, file_name=nom, mime="text/plain")
+
+
 # --- INTERFACE PRINCIPALE ---
+profiler = start_profiling() if profiling_enabled() else None
+
 st.title(TITLE)
 
+with st.sidebar:
+    export_all()
+
+    file_attente = get_rate_limiter().queue_depth()
+    if sum(file_attente.values()) > 0:
+        st.caption("Requêtes Google en attente : " +
+                   ", ".join(f"{n} {PRIORITY_NAMES[p]}" for p, n in file_attente.items() if n > 0))
+
 HEADER_TP_EAU = "TP1 : l'eau"
 HEADER_TP_PHOTOSYNTHESE = "TP5 : la photosynthèse"
 HEADER_TP_TOURNESOL = "Votre tournesol"
 HEADER_PEER_REVIEW = "TP7 : évaluation par les pairs du protocole"
+HEADER_ADMIN = "🔧 Administration"
 
 MANDATORY_FIELDS_MISSING = "Veuillez remplir tous les champs obligatoires marqués d'un *"
 
-tab_eau, tab_photo, tab_tournesol, tab_peer_review = st.tabs([HEADER_TP_EAU,
-                                                              HEADER_TP_PHOTOSYNTHESE,
-                                                              HEADER_TP_TOURNESOL,
-                                                              HEADER_PEER_REVIEW])
+tabs = st.tabs([HEADER_TP_EAU,
+                HEADER_TP_PHOTOSYNTHESE,
+                HEADER_TP_TOURNESOL,
+                HEADER_PEER_REVIEW] + ([HEADER_ADMIN] if is_admin() else []))
+tab_eau, tab_photo, tab_tournesol, tab_peer_review = tabs[:4]
 
 # =================================================================
 # ONGLET 1 : SÉANCE EAU
@@ -183,47 +1388,52 @@ tab_eau, tab_photo, tab_tournesol, tab_peer_review = st.tabs([HEADER_TP_EAU,
 with tab_eau:
     st.header(HEADER_TP_EAU)
 
-    with st.form("form_eau", clear_on_submit=True):
-        st.write("### Poromètre : ajouter une mesure")
+    @st.fragment
+    @profiled
+    def form_eau():
+        with st.form("form_eau", clear_on_submit=True):
+            st.write("### Poromètre : ajouter une mesure")
 
-        c1, c2, c3 = st.columns(3)
-        with c1:
-            date_v = st.date_input("Date de la mesure *", format="DD/MM/YYYY", value=datetime.now(TIME_ZONE))
-            heure_v = st.time_input("Heure de la mesure*", value=datetime.now(TIME_ZONE))
-        with c2:
-            rang = st.number_input("Rang de la feuille *", step=1, min_value=1,
-                                   help="Numéro d'ordre de la feuille (par ordre d'apparition). La feuille la plus "
-                                        "âgée (rang 1) est la feuille la plus basse alors que la feuille la plus "
-                                        "récente (rang élevé) est celle qui se trouve le plus haut. Chez le tournesol, "
-                                        "les premières feuilles sont parfois opposées. Dans ce cas, vous pouvez les "
-                                        "numéroter 1 et 2 au hasard, puis 3 et 4 au hasard.")
-            face = st.selectbox("Face de la feuille *", ["Abaxiale", "Adaxiale"], index=None, placeholder="Choisir...")
-            etat = st.selectbox("État de la feuille *", ["Bien développée", "Jeune", "Vieille"], index=None, placeholder="Choisir...")
-        with c3:
-            cond = st.number_input("Conductance stomatique (mmol/m².s) *", format="%.2f", value=None, step=0.01,
-                                   min_value=0.0, max_value=1200.0)
-            par = st.number_input("PAR (µmol/m².s)", format="%.2f", value=None, step=0.01,
-                                  min_value=0.0, max_value=2500.0)
+            c1, c2, c3 = st.columns(3)
+            with c1:
+                date_v = st.date_input("Date de la mesure *", format="DD/MM/YYYY", value=datetime.now(TIME_ZONE))
+                heure_v = st.time_input("Heure de la mesure*", value=datetime.now(TIME_ZONE))
+            with c2:
+                rang = st.number_input("Rang de la feuille *", step=1, min_value=1,
+                                       help="Numéro d'ordre de la feuille (par ordre d'apparition). La feuille la plus "
+                                            "âgée (rang 1) est la feuille la plus basse alors que la feuille la plus "
+                                            "récente (rang élevé) est celle qui se trouve le plus haut. Chez le tournesol, "
+                                            "les premières feuilles sont parfois opposées. Dans ce cas, vous pouvez les "
+                                            "numéroter 1 et 2 au hasard, puis 3 et 4 au hasard.")
+                face = st.selectbox("Face de la feuille *", ["Abaxiale", "Adaxiale"], index=None, placeholder="Choisir...")
+                etat = st.selectbox("État de la feuille *", ["Bien développée", "Jeune", "Vieille"], index=None, placeholder="Choisir...")
+            with c3:
+                cond = st.number_input("Conductance stomatique (mmol/m².s) *", format="%.2f", value=None, step=0.01,
+                                       min_value=0.0, max_value=1200.0)
+                par = st.number_input("PAR (µmol/m².s)", format="%.2f", value=None, step=0.01,
+                                      min_value=0.0, max_value=2500.0)
         
-        remarque = st.text_area("Remarque", key="rem_eau")
-        submit = st.form_submit_button("Enregistrer")
-
-        if submit:
-            if any(v is None for v in [rang, etat, face, cond]):
-                st.error(MANDATORY_FIELDS_MISSING)
-            else:
-                new_row = {
-                    "date": date_v.strftime("%d/%m/%Y"),
-                    "heure": heure_v.strftime("%H:%M"),
-                    "rang_f": rang,
-                    "état_f": etat,
-                    "face_f": face,
-                    "cond": cond,
-                    "PAR": par,
-                    "remarque": remarque
-                }
-
-                save_data("url_eau", new_row)
+            remarque = st.text_area("Remarque", key="rem_eau")
+            submit = st.form_submit_button("Enregistrer")
+
+            if submit:
+                if any(v is None for v in [rang, etat, face, cond]):
+                    st.error(MANDATORY_FIELDS_MISSING)
+                else:
+                    new_row = {
+                        "date": date_v.strftime("%d/%m/%Y"),
+                        "heure": heure_v.strftime("%H:%M"),
+                        "rang_f": rang,
+                        "état_f": etat,
+                        "face_f": face,
+                        "cond": cond,
+                        "PAR": par,
+                        "remarque": remarque
+                    }
+
+                    save_data("url_eau", new_row)
+
+    form_eau()
 
     show_data("url_eau", "poromètre")
 
@@ -242,59 +1452,68 @@ with tab_photo:
     if type_fichier == "IRGA":
         st.write("### IRGA : ajouter une mesure")
 
-        with st.form("form_irga", clear_on_submit=True):
-            c1, c2, c3, c4 = st.columns(4)
+        @st.fragment
+        @profiled
+        def form_irga():
+            with st.form("form_irga", clear_on_submit=True):
+                c1, c2, c3, c4 = st.columns(4)
+
+                with c1:
+                    date_v = st.date_input("Date de la mesure *", format="DD/MM/YYYY", value=datetime.now(TIME_ZONE))
+                    heure_v = st.time_input("Heure de la mesure*", value=datetime.now(TIME_ZONE))
+                    id_p = st.number_input("ID plante (1-20) *", 1, 20, value=None, step=1)
+                    rang_f = st.number_input("Rang de la feuille *", 1, 20, value=None, step=1)
+
+                with c2:
+                    c_in = st.number_input("CO2 in (ppm) *", value=None, step=1)
+                    c_out = st.number_input("CO2 out (ppm) *", value=None, step=1)
+                    h_in = st.number_input("H2O in (mbar) *", value=None, step=0.1)
+                    h_out = st.number_input("H2O out (mbar) *", value=None, step=0.1)
+
+                with c3:
+                    qleaf = st.number_input("PAR (Qleaf) (µmol/m².s) *", value=None, step=0.01)
+                    pres = st.number_input("Pression (bar) *", value=None, step=0.01)
+                    temp = st.number_input("Température (°C) *", value=None, step=0.1)
+                    flux = st.number_input("Flux d'air (U) (µmol/s) *", value=None, step=0.01)
+
+                with c4:
+                    a_val = st.number_input("A (µmol/m².s) *", value=None, step=0.01)
+                    e_val = st.number_input("E (mmol/m².s) *", value=None, step=0.01)
+                    trait = st.selectbox("Traitement *", ["Lumière", "Ombre"], index=None)
+            
+                remarque = st.text_area("Remarque", key="rem_irga")
 
-            with c1:
-                date_v = st.date_input("Date de la mesure *", format="DD/MM/YYYY", value=datetime.now(TIME_ZONE))
-                heure_v = st.time_input("Heure de la mesure*", value=datetime.now(TIME_ZONE))
-                id_p = st.number_input("ID plante (1-20) *", 1, 20, value=None, step=1)
-                rang_f = st.number_input("Rang de la feuille *", 1, 20, value=None, step=1)
+                if st.form_submit_button("Enregistrer"):
+                    check_list = [id_p, c_in, c_out, h_in, h_out, qleaf, pres, temp, flux, a_val, e_val, trait, rang_f]
+                    if any(v is None for v in check_list):
+                        st.error(MANDATORY_FIELDS_MISSING)
+                    else:
+                        new_row = {
+                            "date": date_v.strftime("%d/%m/%Y"),
+                            "heure": heure_v.strftime("%H:%M"),
+                            "plante_ID": id_p,
+                            "rang_f": rang_f,
+                            "CO2_in": c_in,
+                            "CO2_out": c_out,
+                            "H2O_in": h_in,
+                            "H2O_out": h_out,
+                            "PAR": qleaf,
+                            "pression": pres,
+                            "temp": temp,
+                            "flux_air": flux,
+                            "A": a_val,
+                            "E": e_val,
+                            "traitement": trait,
+                            "remarque": remarque
+                        }
 
-            with c2:
-                c_in = st.number_input("CO2 in (ppm) *", value=None, step=1)
-                c_out = st.number_input("CO2 out (ppm) *", value=None, step=1)
-                h_in = st.number_input("H2O in (mbar) *", value=None, step=0.1)
-                h_out = st.number_input("H2O out (mbar) *", value=None, step=0.1)
+                        save_data("url_irga", new_row)
 
-            with c3:
-                qleaf = st.number_input("PAR (Qleaf) (µmol/m².s) *", value=None, step=0.01)
-                pres = st.number_input("Pression (bar) *", value=None, step=0.01)
-                temp = st.number_input("Température (°C) *", value=None, step=0.1)
-                flux = st.number_input("Flux d'air (U) (µmol/s) *", value=None, step=0.01)
-
-            with c4:
-                a_val = st.number_input("A (µmol/m².s) *", value=None, step=0.01)
-                e_val = st.number_input("E (mmol/m².s) *", value=None, step=0.01)
-                trait = st.selectbox("Traitement *", ["Lumière", "Ombre"], index=None)
-            
-            remarque = st.text_area("Remarque", key="rem_irga")
+        form_irga()
 
-            if st.form_submit_button("Enregistrer"):
-                check_list = [id_p, c_in, c_out, h_in, h_out, qleaf, pres, temp, flux, a_val, e_val, trait, rang_f]
-                if any(v is None for v in check_list):
-                    st.error(MANDATORY_FIELDS_MISSING)
-                else:
-                    new_row = {
-                        "date": date_v.strftime("%d/%m/%Y"),
-                        "heure": heure_v.strftime("%H:%M"),
-                        "plante_ID": id_p,
-                        "rang_f": rang_f,
-                        "CO2_in": c_in,
-                        "CO2_out": c_out,
-                        "H2O_in": h_in,
-                        "H2O_out": h_out,
-                        "PAR": qleaf,
-                        "pression": pres,
-                        "temp": temp,
-                        "flux_air": flux,
-                        "A": a_val,
-                        "E": e_val,
-                        "traitement": trait,
-                        "remarque": remarque
-                    }
+        bulk_import("url_irga", "IRGA")
 
-                    save_data("url_irga", new_row)
+        show_comparison("url_irga", "IRGA")
 
         show_data("url_irga", "IRGA")
 
@@ -302,40 +1521,47 @@ with tab_photo:
     elif type_fichier == "Poromètre":
         st.write("### Poromètre : ajouter une mesure")
 
-        with st.form("form_poro", clear_on_submit=True):
-            c1, c2 = st.columns(2)
+        @st.fragment
+        @profiled
+        def form_poro():
+            with st.form("form_poro", clear_on_submit=True):
+                c1, c2 = st.columns(2)
+
+                with c1:
+                    date_v = st.date_input("Date de la mesure *", format="DD/MM/YYYY", value=datetime.now(TIME_ZONE))
+                    heure_v = st.time_input("Heure de la mesure *", value=datetime.now(TIME_ZONE))
+                    id_p = st.number_input("ID plante (1-20) *", 1, 20, value=None, step=1)
+                    rang_f = st.number_input("Rang de la feuille *", 1, 20, value=None, step=1)
+
+                with c2:
+                    gs = st.number_input("Conductance stomatique [mol/m².s] *", value=None, step=0.1,
+                                         min_value=0.0, max_value=1200.0)
+                    par = st.number_input("PAR (Qamb) [µmol/m².s] *", value=None, step=0.01,
+                                          min_value=0.0, max_value=2500.0)
+                    trait = st.selectbox("Traitement *", ["Lumière", "Ombre"], index=None)
+            
+                remarque = st.text_area("Remarque", key="rem_poro")
 
-            with c1:
-                date_v = st.date_input("Date de la mesure *", format="DD/MM/YYYY", value=datetime.now(TIME_ZONE))
-                heure_v = st.time_input("Heure de la mesure *", value=datetime.now(TIME_ZONE))
-                id_p = st.number_input("ID plante (1-20) *", 1, 20, value=None, step=1)
-                rang_f = st.number_input("Rang de la feuille *", 1, 20, value=None, step=1)
+                if st.form_submit_button("Enregistrer"):
+                    if any(v is None for v in [id_p, gs, par, trait, rang_f]):
+                        st.error(MANDATORY_FIELDS_MISSING)
+                    else:
+                        new_row = {
+                            "date": date_v.strftime("%d/%m/%Y"),
+                            "heure": heure_v.strftime("%H:%M"),
+                            "plante_ID": id_p,
+                            "rang_f": rang_f,
+                            "cond": gs,
+                            "PAR": par,
+                            "traitement": trait,
+                            "remarque": remarque
+                        }
 
-            with c2:
-                gs = st.number_input("Conductance stomatique [mol/m².s] *", value=None, step=0.1,
-                                     min_value=0.0, max_value=1200.0)
-                par = st.number_input("PAR (Qamb) [µmol/m².s] *", value=None, step=0.01,
-                                      min_value=0.0, max_value=2500.0)
-                trait = st.selectbox("Traitement *", ["Lumière", "Ombre"], index=None)
-            
-            remarque = st.text_area("Remarque", key="rem_poro")
+                        save_data("url_poro", new_row)
 
-            if st.form_submit_button("Enregistrer"):
-                if any(v is None for v in [id_p, gs, par, trait, rang_f]):
-                    st.error(MANDATORY_FIELDS_MISSING)
-                else:
-                    new_row = {
-                        "date": date_v.strftime("%d/%m/%Y"),
-                        "heure": heure_v.strftime("%H:%M"),
-                        "plante_ID": id_p,
-                        "rang_f": rang_f,
-                        "cond": gs,
-                        "PAR": par,
-                        "traitement": trait,
-                        "remarque": remarque
-                    }
+        form_poro()
 
-                    save_data("url_poro", new_row)
+        show_comparison("url_poro", "poromètre")
 
         show_data("url_poro", "poromètre")
 
@@ -343,36 +1569,41 @@ with tab_photo:
     elif type_fichier == "Croissance":
         st.write("### Croissance : ajouter une mesure")
 
-        with st.form("form_croissance", clear_on_submit=True):
-            c1, c2 = st.columns(2)
-
-            with c1:
-                date_v = st.date_input("Date de la mesure *", format="DD/MM/YYYY", value=datetime.now(TIME_ZONE))
-                heure_v = st.time_input("Heure de la mesure *", value=datetime.now(TIME_ZONE))
-                id_p = st.number_input("ID plante (1-20) *", 1, 20, value=None, step=1)
-
-            with c2:
-                h_tige = st.number_input("Hauteur de la tige (cm) *", value=None, step=0.1)
-                n_feuilles = st.number_input("Nombre de feuilles *", step=1, value=None)
-                trait = st.selectbox("Traitement *", ["Lumière", "Ombre"], index=None)
+        @st.fragment
+        @profiled
+        def form_croissance():
+            with st.form("form_croissance", clear_on_submit=True):
+                c1, c2 = st.columns(2)
+
+                with c1:
+                    date_v = st.date_input("Date de la mesure *", format="DD/MM/YYYY", value=datetime.now(TIME_ZONE))
+                    heure_v = st.time_input("Heure de la mesure *", value=datetime.now(TIME_ZONE))
+                    id_p = st.number_input("ID plante (1-20) *", 1, 20, value=None, step=1)
+
+                with c2:
+                    h_tige = st.number_input("Hauteur de la tige (cm) *", value=None, step=0.1)
+                    n_feuilles = st.number_input("Nombre de feuilles *", step=1, value=None)
+                    trait = st.selectbox("Traitement *", ["Lumière", "Ombre"], index=None)
             
-            remarque = st.text_area("Remarque", key="rem_crois")
+                remarque = st.text_area("Remarque", key="rem_crois")
 
-            if st.form_submit_button("Enregistrer"):
-                if any(v is None for v in [id_p, h_tige, n_feuilles, trait]):
-                    st.error(MANDATORY_FIELDS_MISSING)
-                else:
-                    new_row = {
-                        "date": date_v.strftime("%d/%m/%Y"),
-                        "heure": heure_v.strftime("%H:%M"),
-                        "plante_ID": id_p,
-                        "hauteur_tige": h_tige,
-                        "n_feuilles": n_feuilles,
-                        "traitement": trait,
-                        "remarque": remarque
-                    }
+                if st.form_submit_button("Enregistrer"):
+                    if any(v is None for v in [id_p, h_tige, n_feuilles, trait]):
+                        st.error(MANDATORY_FIELDS_MISSING)
+                    else:
+                        new_row = {
+                            "date": date_v.strftime("%d/%m/%Y"),
+                            "heure": heure_v.strftime("%H:%M"),
+                            "plante_ID": id_p,
+                            "hauteur_tige": h_tige,
+                            "n_feuilles": n_feuilles,
+                            "traitement": trait,
+                            "remarque": remarque
+                        }
+
+                        save_data("url_croissance", new_row)
 
-                    save_data("url_croissance", new_row)
+        form_croissance()
 
         show_data("url_croissance", "croissance")
 
@@ -380,74 +1611,92 @@ with tab_photo:
     elif type_fichier == "Fluorimètre":
         st.write("### Fluorimètre : ajouter une mesure")
 
-        with st.form("form_fluo", clear_on_submit=True):
-            c1, c2 = st.columns(2)
+        @st.fragment
+        @profiled
+        def form_fluo():
+            with st.form("form_fluo", clear_on_submit=True):
+                c1, c2 = st.columns(2)
+
+                with c1:
+                    date_v = st.date_input("Date de la mesure *", format="DD/MM/YYYY", value=datetime.now(TIME_ZONE))
+                    heure_v = st.time_input("Heure de la mesure *", value=datetime.now(TIME_ZONE))
+                    id_p = st.number_input("ID plante (1-20) *", 1, 20, value=None, step=1)
+                    trait = st.selectbox("Traitement *", ["Lumière", "Ombre"], index=None)
+
+                with c2:
+                    rang_f = st.number_input("Rang de la feuille *", 1, 20, value=None, step=1)
+                    y_ii = st.number_input("Y_II *", format="%.3f", value=None, step=0.001)
+                    a_par = st.number_input("Actinic PAR", value=None, step=1)
+            
+                remarque = st.text_area("Remarque", key="rem_fluo")
 
-            with c1:
-                date_v = st.date_input("Date de la mesure *", format="DD/MM/YYYY", value=datetime.now(TIME_ZONE))
-                heure_v = st.time_input("Heure de la mesure *", value=datetime.now(TIME_ZONE))
-                id_p = st.number_input("ID plante (1-20) *", 1, 20, value=None, step=1)
-                trait = st.selectbox("Traitement *", ["Lumière", "Ombre"], index=None)
+                if st.form_submit_button("Enregistrer"):
+                    if any(v is None for v in [id_p, trait, y_ii, rang_f]):
+                        st.error(MANDATORY_FIELDS_MISSING)
+                    else:
+                        new_row = {
+                            "date": date_v.strftime("%d/%m/%Y"),
+                            "heure": heure_v.strftime("%H:%M"),
+                            "plante_ID": id_p,
+                            "rang_f": rang_f,
+                            "traitement": trait,
+                            "Y_II": y_ii,
+                            "act_PAR": a_par,
+                            "remarque": remarque
+                        }
 
-            with c2:
-                rang_f = st.number_input("Rang de la feuille *", 1, 20, value=None, step=1)
-                y_ii = st.number_input("Y_II *", format="%.3f", value=None, step=0.001)
-                a_par = st.number_input("Actinic PAR", value=None, step=1)
-            
-            remarque = st.text_area("Remarque", key="rem_fluo")
+                        save_data("url_fluo", new_row)
 
-            if st.form_submit_button("Enregistrer"):
-                if any(v is None for v in [id_p, trait, y_ii, rang_f]):
-                    st.error(MANDATORY_FIELDS_MISSING)
-                else:
-                    new_row = {
-                        "date": date_v.strftime("%d/%m/%Y"),
-                        "heure": heure_v.strftime("%H:%M"),
-                        "plante_ID": id_p,
-                        "rang_f": rang_f,
-                        "traitement": trait,
-                        "Y_II": y_ii,
-                        "act_PAR": a_par,
-                        "remarque": remarque
-                    }
+        form_fluo()
+
+        bulk_import("url_fluo", "fluorimètre")
 
-                    save_data("url_fluo", new_row)
+        show_comparison("url_fluo", "fluorimètre")
 
         show_data("url_fluo", "fluorimètre")
     elif type_fichier == "Chlorophyllomètre":
         st.write("### Chlorophyllomètre : ajouter une mesure")
 
-        with st.form("form_chloro", clear_on_submit=True):
-            c1, c2 = st.columns(2)
+        @st.fragment
+        @profiled
+        def form_chloro():
+            with st.form("form_chloro", clear_on_submit=True):
+                c1, c2 = st.columns(2)
+
+                with c1:
+                    date_v = st.date_input("Date de la mesure *", format="DD/MM/YYYY", value=datetime.now(TIME_ZONE))
+                    heure_v = st.time_input("Heure de la mesure *", value=datetime.now(TIME_ZONE))
+                    id_p = st.number_input("ID plante (1-20) *", 1, 20, value=None, step=1)
+                    trait = st.selectbox("Traitement *", ["Lumière", "Ombre"], index=None)
+
+                with c2:
+                    rang_f = st.number_input("Rang de la feuille *", 1, 20, value=None, step=1)
+                    appareil = st.selectbox("Appareil *", ["Neuf", "Vieux"], index=None)
+                    CCI = st.number_input("Chlorophyll Content Index (CCI) *", format="%.3f", value=None, step=0.001)
+                    PAR = st.number_input("PAR [µmol/m²/s] *", format="%.3f", value=None, step=0.001)
+
+                if st.form_submit_button("Enregistrer"):
+                    if any(v is None for v in [id_p, trait, appareil, CCI, PAR, rang_f]):
+                        st.error(MANDATORY_FIELDS_MISSING)
+                    else:
+                        new_row = {
+                            "date": date_v.strftime("%d/%m/%Y"),
+                            "heure": heure_v.strftime("%H:%M"),
+                            "plante_ID": id_p,
+                            "rang_f": rang_f,
+                            "traitement": trait,
+                            "appareil": appareil,
+                            "CCI": CCI,
+                            "PAR": PAR,
+                        }
 
-            with c1:
-                date_v = st.date_input("Date de la mesure *", format="DD/MM/YYYY", value=datetime.now(TIME_ZONE))
-                heure_v = st.time_input("Heure de la mesure *", value=datetime.now(TIME_ZONE))
-                id_p = st.number_input("ID plante (1-20) *", 1, 20, value=None, step=1)
-                trait = st.selectbox("Traitement *", ["Lumière", "Ombre"], index=None)
+                        save_data("url_chloro", new_row)
 
-            with c2:
-                rang_f = st.number_input("Rang de la feuille *", 1, 20, value=None, step=1)
-                appareil = st.selectbox("Appareil *", ["Neuf", "Vieux"], index=None)
-                CCI = st.number_input("Chlorophyll Content Index (CCI) *", format="%.3f", value=None, step=0.001)
-                PAR = st.number_input("PAR [µmol/m²/s] *", format="%.3f", value=None, step=0.001)
+        form_chloro()
 
-            if st.form_submit_button("Enregistrer"):
-                if any(v is None for v in [id_p, trait, appareil, CCI, PAR, rang_f]):
-                    st.error(MANDATORY_FIELDS_MISSING)
-                else:
-                    new_row = {
-                        "date": date_v.strftime("%d/%m/%Y"),
-                        "heure": heure_v.strftime("%H:%M"),
-                        "plante_ID": id_p,
-                        "rang_f": rang_f,
-                        "traitement": trait,
-                        "appareil": appareil,
-                        "CCI": CCI,
-                        "PAR": PAR,
-                    }
+        bulk_import("url_chloro", "chlorophyllomètre")
 
-                    save_data("url_chloro", new_row)
+        show_comparison("url_chloro", "chlorophyllomètre")
 
         show_data("url_chloro", "chlorophyllomètre")
 
@@ -485,7 +1734,7 @@ with tab_tournesol:
 
     form_selector = st.selectbox("Que voulez-vous faire ?", FORM_TOURNESOL.values())
 
-    tournesols = get_df_from_url(INSCRIPTION)
+    show_student_completeness()
 
     if form_selector == FORM_TOURNESOL[INSCRIPTION]:
         st.write("## Inscrire mon tournesol :sunflower:")
@@ -501,47 +1750,53 @@ with tab_tournesol:
             nouvel identifiant correspondant à votre NOMA + "_B", par exemple "31581300_B".
         ''')
 
-        students = get_df_from_url('listing_etudiants')
+        @st.fragment
+        @profiled
+        def form_inscription():
+            tournesols = get_df_from_url(INSCRIPTION)
+            students = get_df_from_url('listing_etudiants')
         
-        with st.form(INSCRIPTION, clear_on_submit=True):
-            col1, col2 = st.columns(2)
-
-            with col1:
-                etudiant = st.selectbox("Étudiant·e",
-                                        students.agg(lambda x: f"{x['nom']} {x['prénom']} - {x['NOMA']:.0f}", axis=1),
-                                        index=None,
-                                        help="Si vous n'apparaîssez pas ici, contacter Antoine au plus vite.")
-                second_tournesol = st.checkbox("Mon tournesol est mort. Ceci est mon 2ème tournesol.")
-
-            with col2:
-                date_reception = st.date_input("Date de réception du tournesol", format="DD/MM/YYYY",
-                                               value=datetime.now(TIME_ZONE),
-                                               help="Vous recevrez votre tournesol lors du TP1, en S2 ou S3 selon votre"
-                                                    "groupe de TP.")
-
-            remarque = st.text_area("Remarque :", key='remarque' + INSCRIPTION)
+            with st.form(INSCRIPTION, clear_on_submit=True):
+                col1, col2 = st.columns(2)
+
+                with col1:
+                    etudiant = st.selectbox("Étudiant·e",
+                                            students.agg(lambda x: f"{x['nom']} {x['prénom']} - {x['NOMA']:.0f}", axis=1),
+                                            index=None,
+                                            help="Si vous n'apparaîssez pas ici, contacter Antoine au plus vite.")
+                    second_tournesol = st.checkbox("Mon tournesol est mort. Ceci est mon 2ème tournesol.")
+
+                with col2:
+                    date_reception = st.date_input("Date de réception du tournesol", format="DD/MM/YYYY",
+                                                   value=datetime.now(TIME_ZONE),
+                                                   help="Vous recevrez votre tournesol lors du TP1, en S2 ou S3 selon votre"
+                                                        "groupe de TP.")
+
+                remarque = st.text_area("Remarque :", key='remarque' + INSCRIPTION)
+
+                if st.form_submit_button("Enregistrer"):
+                    mandatory_fields = [etudiant, date_reception]
+                    if any(field is None for field in mandatory_fields):
+                        st.error(MANDATORY_FIELDS_MISSING)
+                    else:
+                        NOMA = etudiant.split(' - ')[1]
 
-            if st.form_submit_button("Enregistrer"):
-                mandatory_fields = [etudiant, date_reception]
-                if any(field is None for field in mandatory_fields):
-                    st.error(MANDATORY_FIELDS_MISSING)
-                else:
-                    NOMA = etudiant.split(' - ')[1]
+                        if second_tournesol:
+                            NOMA += "_B"
 
-                    if second_tournesol:
-                        NOMA += "_B"
+                        if tournesols.shape[0] > 0 and NOMA in tournesols['plante_ID'].astype(str).to_list():
+                            st.error("Vous avez déjà inscrit votre tournesol. Si il est mort et que vous souhaitez inscrire "
+                                     "un 2ème tournesol, cochez la case correspondante.")
+                        else:
+                            new_row = {
+                                "plante_ID": str(NOMA),
+                                "date_reception": date_reception.strftime("%d/%m/%Y"),
+                                "remarque": remarque,
+                            }
 
-                    if tournesols.shape[0] > 0 and NOMA in tournesols['plante_ID'].astype(str).to_list():
-                        st.error("Vous avez déjà inscrit votre tournesol. Si il est mort et que vous souhaitez inscrire "
-                                 "un 2ème tournesol, cochez la case correspondante.")
-                    else:
-                        new_row = {
-                            "plante_ID": str(NOMA),
-                            "date_reception": date_reception.strftime("%d/%m/%Y"),
-                            "remarque": remarque,
-                        }
+                            save_data(INSCRIPTION, new_row)
 
-                        save_data(INSCRIPTION, new_row)
+        form_inscription()
 
         show_data(INSCRIPTION, "tournesols")
 
@@ -559,129 +1814,155 @@ with tab_tournesol:
             Si votre NOMA n'apparaît, c'est que vous n'avez pas inscrit votre tournesol.
         ''')
 
-        with st.form(PIECE, clear_on_submit=True):
-            col1, col2 = st.columns(2)
-
-            with col1:
-                plante_ID = st.selectbox("ID du tournesol *", tournesols['plante_ID'], index=None,
-                                         help=HELP_TEXT_ID_TOURNESOL)
-                distance_fenetre = st.number_input("Distance entre le tournesol et la fenêtre la plus proche [cm] *", step=1)
-                heure_lum_art = st.number_input("Durée moyenne d'exposition à la lumière artificielle [h] *", step=0.5,
-                                                min_value=0.0, max_value=18.0)
-                position = st.text_input("Coordonnées GPS (extraite via clic-droit sur Google Maps) *",
-                                         placeholder="50.6662847889796, 4.620254738686959")
-
-            with col2:
-                orientation = st.selectbox("Orientation de la fenêtre la plus proche *", ["Nord", "Sud", "Est", "Ouest"], index=None)
-                heure_lum_nat = st.number_input("Durée moyenne d'exposition à la lumière naturelle [h] *", step=0.5,
-                                                min_value=0.0, max_value=18.0)
-                temp = st.selectbox("Température moyenne dans la pièce [°C] *",
-                                    ["Chaude (> 21 °C)", "Moyenne (19-21 °C)", "Fraîche (17-19 °C)", "Froide (< 17 °C)"],
-                                    index=None,
-                                    help="Estimation de la température moyenne dans la pièce tout au long de l'expérience. "
-                                         "Pour avoir une idée, mesurez quelques fois la température de la pièce entre 19 et 21h.")
-
-            remarque = st.text_area("Remarque(s) :", key='remarque' + PIECE)
-
-            if st.form_submit_button("Enregistrer"):
-                mandatory_fields = [plante_ID, distance_fenetre, heure_lum_nat, position, orientation, heure_lum_art,
-                                    temp, position]
-
-                if any(field is None for field in mandatory_fields):
-                    st.error(MANDATORY_FIELDS_MISSING)
-                else:
-                    new_row = {
-                        "plante_ID": str(plante_ID),
-                        "orientation": orientation,
-                        "distance_fenetre": distance_fenetre,
-                        "heure_lum_nat": heure_lum_nat,
-                        "heure_lum_art": heure_lum_art,
-                        "temp": temp,
-                        "position": position,
-                        "remarque": remarque
-                    }
+        @st.fragment
+        @profiled
+        def form_piece():
+            tournesols = get_df_from_url(INSCRIPTION)
+
+            with st.form(PIECE, clear_on_submit=True):
+                col1, col2 = st.columns(2)
+
+                with col1:
+                    plante_ID = st.selectbox("ID du tournesol *", tournesols['plante_ID'], index=None,
+                                             help=HELP_TEXT_ID_TOURNESOL)
+                    distance_fenetre = st.number_input("Distance entre le tournesol et la fenêtre la plus proche [cm] *", step=1)
+                    heure_lum_art = st.number_input("Durée moyenne d'exposition à la lumière artificielle [h] *", step=0.5,
+                                                    min_value=0.0, max_value=18.0)
+                    position = st.text_input("Coordonnées GPS (extraite via clic-droit sur Google Maps) *",
+                                             placeholder="50.6662847889796, 4.620254738686959")
+
+                with col2:
+                    orientation = st.selectbox("Orientation de la fenêtre la plus proche *", ["Nord", "Sud", "Est", "Ouest"], index=None)
+                    heure_lum_nat = st.number_input("Durée moyenne d'exposition à la lumière naturelle [h] *", step=0.5,
+                                                    min_value=0.0, max_value=18.0)
+                    temp = st.selectbox("Température moyenne dans la pièce [°C] *",
+                                        ["Chaude (> 21 °C)", "Moyenne (19-21 °C)", "Fraîche (17-19 °C)", "Froide (< 17 °C)"],
+                                        index=None,
+                                        help="Estimation de la température moyenne dans la pièce tout au long de l'expérience. "
+                                             "Pour avoir une idée, mesurez quelques fois la température de la pièce entre 19 et 21h.")
+
+                remarque = st.text_area("Remarque(s) :", key='remarque' + PIECE)
+
+                if st.form_submit_button("Enregistrer"):
+                    mandatory_fields = [plante_ID, distance_fenetre, heure_lum_nat, position, orientation, heure_lum_art,
+                                        temp, position]
+
+                    if any(field is None for field in mandatory_fields):
+                        st.error(MANDATORY_FIELDS_MISSING)
+                    elif not parse_positions([position])["position_valide"].iloc[0]:
+                        st.error("Coordonnées GPS illisibles : copiez-les depuis Google Maps "
+                                 "(par exemple 50.6662847889796, 4.620254738686959).")
+                    else:
+                        new_row = {
+                            "plante_ID": str(plante_ID),
+                            "orientation": orientation,
+                            "distance_fenetre": distance_fenetre,
+                            "heure_lum_nat": heure_lum_nat,
+                            "heure_lum_art": heure_lum_art,
+                            "temp": temp,
+                            "position": position,
+                            "remarque": remarque
+                        }
+
+                        save_data(PIECE, new_row)
 
-                    save_data(PIECE, new_row)
+        form_piece()
+
+        show_rooms_map()
 
         show_data(PIECE, "caractéristiques des pièces")
 
     if form_selector == FORM_TOURNESOL[OBS_PLANTE]:
         st.write("## Observation de la plante entière")
 
-        with st.form(OBS_PLANTE, clear_on_submit=True):
-            col1, col2 = st.columns(2)
+        @st.fragment
+        @profiled
+        def form_obs_plante():
+            tournesols = get_df_from_url(INSCRIPTION)
 
-            with col1:
-                plante_ID = st.selectbox("ID du tournesol *", tournesols['plante_ID'], index=None,
-                                         help=HELP_TEXT_ID_TOURNESOL)
-                date_mes = st.date_input("Date de l'observation *", format="DD/MM/YYYY", value=datetime.now(TIME_ZONE))
+            with st.form(OBS_PLANTE, clear_on_submit=True):
+                col1, col2 = st.columns(2)
 
-                tournesol_mort = st.checkbox("Mon tournesol est mort cette semaine et je suis très triste 😢")
+                with col1:
+                    plante_ID = st.selectbox("ID du tournesol *", tournesols['plante_ID'], index=None,
+                                             help=HELP_TEXT_ID_TOURNESOL)
+                    date_mes = st.date_input("Date de l'observation *", format="DD/MM/YYYY", value=datetime.now(TIME_ZONE))
 
-            with col2:
-                stade_liste = ["A2",
-                               "B2", "B3", "B4", "B5", "B6", "B7", "B8", "B9", "B10", "B11", "B12", "B13",
-                               "E1", "E2", "E3", "E4",
-                               "F1", "F3.2"]
+                    tournesol_mort = st.checkbox("Mon tournesol est mort cette semaine et je suis très triste 😢")
 
-                hauteur = st.number_input("Hauteur (du pot jusqu'au bourgeon terminal) * [cm]", format="%.1f")
-                stade = st.selectbox("Stade de la plante (voir descriptif des stades sur Moodle)", stade_liste, index=None)
+                with col2:
+                    stade_liste = ["A2",
+                                   "B2", "B3", "B4", "B5", "B6", "B7", "B8", "B9", "B10", "B11", "B12", "B13",
+                                   "E1", "E2", "E3", "E4",
+                                   "F1", "F3.2"]
 
-            if st.form_submit_button("Enregistrer"):
-                mandatory_fields = [plante_ID, date_mes, hauteur, stade]
-                if any(field is None for field in mandatory_fields):
-                    st.error(MANDATORY_FIELDS_MISSING)
-                else:
-                    new_row = {
-                        "plante_ID": str(plante_ID),
-                        "date": date_mes.strftime("%d/%m/%Y"),
-                        "hauteur": hauteur,
-                        "stade": stade,
-                        "mort": tournesol_mort,
-                    }
+                    hauteur = st.number_input("Hauteur (du pot jusqu'au bourgeon terminal) * [cm]", format="%.1f")
+                    stade = st.selectbox("Stade de la plante (voir descriptif des stades sur Moodle)", stade_liste, index=None)
+
+                if st.form_submit_button("Enregistrer"):
+                    mandatory_fields = [plante_ID, date_mes, hauteur, stade]
+                    if any(field is None for field in mandatory_fields):
+                        st.error(MANDATORY_FIELDS_MISSING)
+                    else:
+                        new_row = {
+                            "plante_ID": str(plante_ID),
+                            "date": date_mes.strftime("%d/%m/%Y"),
+                            "hauteur": hauteur,
+                            "stade": stade,
+                            "mort": tournesol_mort,
+                        }
+
+                        save_data(OBS_PLANTE, new_row)
 
-                    save_data(OBS_PLANTE, new_row)
+        form_obs_plante()
 
         show_data(OBS_PLANTE, "observations de la plante entière")
 
     if form_selector == FORM_TOURNESOL[OBS_FEUILLE]:
         st.write("## Observation des feuilles")
 
-        with st.form(OBS_FEUILLE, clear_on_submit=True):
-            col1, col2 = st.columns(2)
-
-            with col1:
-                plante_ID = st.selectbox("ID du tournesol *", tournesols['plante_ID'], index=None,
-                                         help=HELP_TEXT_ID_TOURNESOL)
-                date_mes = st.date_input("Date de l'observation *", format="DD/MM/YYYY", value=datetime.now(TIME_ZONE))
+        @st.fragment
+        @profiled
+        def form_obs_feuille():
+            tournesols = get_df_from_url(INSCRIPTION)
+
+            with st.form(OBS_FEUILLE, clear_on_submit=True):
+                col1, col2 = st.columns(2)
+
+                with col1:
+                    plante_ID = st.selectbox("ID du tournesol *", tournesols['plante_ID'], index=None,
+                                             help=HELP_TEXT_ID_TOURNESOL)
+                    date_mes = st.date_input("Date de l'observation *", format="DD/MM/YYYY", value=datetime.now(TIME_ZONE))
+
+                with col2:
+                    rang = st.number_input("Rang de la feuille *", step=1, min_value=1,
+                                           help="Numéro d'ordre de la feuille (par ordre d'apparition). La feuille la plus "
+                                                "âgée (rang 1) est la feuille la plus basse alors que la feuille la plus "
+                                                "récente (rang élevé) est celle qui se trouve le plus haut. Chez le tournesol, "
+                                                "les premières feuilles sont parfois opposées. Dans ce cas, vous pouvez les "
+                                                "numéroter 1 et 2 au hasard, puis 3 et 4 au hasard.")
+                    longueur = st.number_input("Longueur de la feuille * [cm]", format="%.1f",
+                                               help="Se mesure de la base du limbe (contre la fin du pétiole) jusqu'à la "
+                                                    "pointe de la feuille.")
+                    largeur = st.number_input("Largeur de la feuille * [cm]", format="%.1f",
+                                              help="Se mesure à l'endroit le plus large du limbe.")
+
+                if st.form_submit_button("Enregistrer"):
+                    mandatory_fields = [plante_ID, date_mes, rang, longueur, largeur]
+                    if any(field is None for field in mandatory_fields):
+                        st.error(MANDATORY_FIELDS_MISSING)
+                    else:
+                        new_row = {
+                            "plante_ID": str(plante_ID),
+                            "date": date_mes.strftime("%d/%m/%Y"),
+                            "rang": rang,
+                            "longueur": longueur,
+                            "largeur": largeur,
+                        }
 
-            with col2:
-                rang = st.number_input("Rang de la feuille *", step=1, min_value=1,
-                                       help="Numéro d'ordre de la feuille (par ordre d'apparition). La feuille la plus "
-                                            "âgée (rang 1) est la feuille la plus basse alors que la feuille la plus "
-                                            "récente (rang élevé) est celle qui se trouve le plus haut. Chez le tournesol, "
-                                            "les premières feuilles sont parfois opposées. Dans ce cas, vous pouvez les "
-                                            "numéroter 1 et 2 au hasard, puis 3 et 4 au hasard.")
-                longueur = st.number_input("Longueur de la feuille * [cm]", format="%.1f",
-                                           help="Se mesure de la base du limbe (contre la fin du pétiole) jusqu'à la "
-                                                "pointe de la feuille.")
-                largeur = st.number_input("Largeur de la feuille * [cm]", format="%.1f",
-                                          help="Se mesure à l'endroit le plus large du limbe.")
-
-            if st.form_submit_button("Enregistrer"):
-                mandatory_fields = [plante_ID, date_mes, rang, longueur, largeur]
-                if any(field is None for field in mandatory_fields):
-                    st.error(MANDATORY_FIELDS_MISSING)
-                else:
-                    new_row = {
-                        "plante_ID": str(plante_ID),
-                        "date": date_mes.strftime("%d/%m/%Y"),
-                        "rang": rang,
-                        "longueur": longueur,
-                        "largeur": largeur,
-                    }
+                        save_data(OBS_FEUILLE, new_row)
 
-                    save_data(OBS_FEUILLE, new_row)
+        form_obs_feuille()
 
         show_data(OBS_FEUILLE, "observations des feuilles")
 
@@ -689,7 +1970,10 @@ with tab_tournesol:
 with tab_peer_review:
     st.header(HEADER_PEER_REVIEW)
 
-    levels = ["Insuffisant", "Suffisant", "Excellent"]
+    levels = REVIEW_LEVELS
+
+    # Colonnes nécessaires aux graphiques : les commentaires ne sont lus qu'à l'ouverture de leur section
+    REVIEW_LEVEL_COLUMNS = ["reviewer", "equipe"] + REVIEW_CRITERIA
 
     FORM_REVIEW = ["Encoder les résultats de votre évaluation d'un protocole d'une autre équipe",
                    "Consulter les évaluations de votre protocole"]
@@ -707,339 +1991,381 @@ with tab_peer_review:
 
         st.write("**Chaque évaluation ne doit être complétée que par un seul membre de l'équipe.**")
 
-        with st.form(PEER_REVIEW):
-
-            left, right = st.columns(2)
+        @st.fragment
+        @profiled
+        def form_peer_review():
+            with st.form(PEER_REVIEW):
 
-            with left:
-                reviewer = st.selectbox("Numéro de l'équipe **évaluatrice** (votre numéro d'équipe donc) *",
-                                        list(range(1, 90)),
-                                        index=None)
-                equipe = st.selectbox("Numéro de l'équipe **évaluée** *",
-                                      list(range(1, 90)),
-                                      index=None)
+                left, right = st.columns(2)
 
-            st.write("#### 🎯 Objectif de l'expérience")
+                with left:
+                    reviewer = st.selectbox("Numéro de l'équipe **évaluatrice** (votre numéro d'équipe donc) *",
+                                            list(range(1, 90)),
+                                            index=None)
+                    equipe = st.selectbox("Numéro de l'équipe **évaluée** *",
+                                          list(range(1, 90)),
+                                          index=None)
 
-            left, right = st.columns(2)
+                st.write("#### 🎯 Objectif de l'expérience")
 
-            with left:
-                objectif = st.selectbox("Clarté de l'objectif *",
-                                        levels, index=None)
+                left, right = st.columns(2)
 
-            with right:
-                coherence = st.selectbox("Cohérence entre le protocole et l'objectif de l'expérience *",
-                                         levels, index=None)
+                with left:
+                    objectif = st.selectbox("Clarté de l'objectif *",
+                                            levels, index=None)
 
-            comment_objectif = st.text_area("Commentaire(s) :", key='comment_objectif')
+                with right:
+                    coherence = st.selectbox("Cohérence entre le protocole et l'objectif de l'expérience *",
+                                             levels, index=None)
 
-            st.write("#### 📰 Vocabulaires et ressources")
+                comment_objectif = st.text_area("Commentaire(s) :", key='comment_objectif')
 
-            left, right = st.columns(2)
+                st.write("#### 📰 Vocabulaires et ressources")
 
-            with left:
-                sources = st.selectbox("Sources scientifiques *",
-                                       levels, index=None)
+                left, right = st.columns(2)
 
-            with right:
-                vocabulaire = st.selectbox("Vocabulaire scientifique *",
+                with left:
+                    sources = st.selectbox("Sources scientifiques *",
                                            levels, index=None)
 
-            comment_sources = st.text_area("Commentaire(s) :", key='comment_sources')
+                with right:
+                    vocabulaire = st.selectbox("Vocabulaire scientifique *",
+                                               levels, index=None)
 
-            st.write("#### 🧪 Traitements et conditions expérimentales")
+                comment_sources = st.text_area("Commentaire(s) :", key='comment_sources')
 
-            left, right = st.columns(2)
+                st.write("#### 🧪 Traitements et conditions expérimentales")
 
-            with left:
-                facteurs = st.selectbox("Facteurs et niveaux testés *",
-                                        levels, index=None)
+                left, right = st.columns(2)
+
+                with left:
+                    facteurs = st.selectbox("Facteurs et niveaux testés *",
+                                            levels, index=None)
 
-                conditions = st.selectbox("Conditions expérimentales (facteurs non-testés) *",
-                                          levels, index=None)
+                    conditions = st.selectbox("Conditions expérimentales (facteurs non-testés) *",
+                                              levels, index=None)
 
-            with right:
-                repetitions = st.selectbox("Nombre de répétitions *",
+                with right:
+                    repetitions = st.selectbox("Nombre de répétitions *",
+                                               levels, index=None)
+
+                    temoins = st.selectbox("Témoins *",
                                            levels, index=None)
 
-                temoins = st.selectbox("Témoins *",
-                                       levels, index=None)
+                comment_traitement = st.text_area("Commentaire(s) :", key='comment_traitement')
 
-            comment_traitement = st.text_area("Commentaire(s) :", key='comment_traitement')
+                st.write("#### 📏 Variables mesurées")
 
-            st.write("#### 📏 Variables mesurées")
+                left, right = st.columns(2)
 
-            left, right = st.columns(2)
+                with left:
+                    precision_methodes = st.selectbox("Précisions des méthodes de mesure *",
+                                                      levels, index=None)
 
-            with left:
-                precision_methodes = st.selectbox("Précisions des méthodes de mesure *",
-                                                  levels, index=None)
+                    homogeneite_methodes = st.selectbox("Homogénéité des méthodes de mesure *",
+                                                        levels, index=None)
 
-                homogeneite_methodes = st.selectbox("Homogénéité des méthodes de mesure *",
-                                                    levels, index=None)
+                with right:
+                    danger_methodes = st.selectbox("Danger des méthodes de mesure pour les plantes *",
+                                                   levels, index=None)
 
-            with right:
-                danger_methodes = st.selectbox("Danger des méthodes de mesure pour les plantes *",
-                                               levels, index=None)
+                comment_mesures = st.text_area("Commentaire(s) :", key='comment_mesures')
 
-            comment_mesures = st.text_area("Commentaire(s) :", key='comment_mesures')
+                st.write("#### 📈 Gestions des données")
 
-            st.write("#### 📈 Gestions des données")
+                left, right = st.columns(2)
 
-            left, right = st.columns(2)
+                with left:
+                    stockage = st.selectbox("Stockage des données *",
+                                            levels, index=None)
 
-            with left:
-                stockage = st.selectbox("Stockage des données *",
-                                        levels, index=None)
+                with right:
+                    analyse = st.selectbox("Analyse des données *",
+                                           levels, index=None)
 
-            with right:
-                analyse = st.selectbox("Analyse des données *",
-                                       levels, index=None)
+                comment_donnees = st.text_area("Commentaire(s) :", key='comment_donnees')
 
-            comment_donnees = st.text_area("Commentaire(s) :", key='comment_donnees')
+                # TODO: would be more coherent to separate in two sections "Forme" et "Logistique"
+                st.write("#### 👓 Forme du protocole")
 
-            # TODO: would be more coherent to separate in two sections "Forme" et "Logistique"
-            st.write("#### 👓 Forme du protocole")
+                left, right = st.columns(2)
 
-            left, right = st.columns(2)
+                with left:
+                    forme = st.selectbox("Forme du texte *",
+                                         levels, index=None)
 
-            with left:
-                forme = st.selectbox("Forme du texte *",
-                                     levels, index=None)
+                    orthographe = st.selectbox("Orthographe *",
+                                               levels, index=None)
 
-                orthographe = st.selectbox("Orthographe *",
+                with right:
+                    schemas = st.selectbox("Présence de schéma(s) *",
                                            levels, index=None)
 
-            with right:
-                schemas = st.selectbox("Présence de schéma(s) *",
-                                       levels, index=None)
+                comment_forme = st.text_area("Commentaire(s) :", key='comment_forme')
 
-            comment_forme = st.text_area("Commentaire(s) :", key='comment_forme')
+                st.write("#### 🧑‍🏭 Logistique")
 
-            st.write("#### 🧑‍🏭 Logistique")
+                left, right = st.columns(2)
 
-            left, right = st.columns(2)
+                with left:
+                    materiel = st.selectbox("Liste de matériel *",
+                                            levels, index=None)
 
-            with left:
-                materiel = st.selectbox("Liste de matériel *",
-                                        levels, index=None)
+                    planning = st.selectbox("Planning de l'expérience *",
+                                            levels, index=None)
 
-                planning = st.selectbox("Planning de l'expérience *",
-                                        levels, index=None)
+                with right:
+                    faisabilite = st.selectbox("Faisabilité du protocole *",
+                                               levels, index=None)
 
-            with right:
-                faisabilite = st.selectbox("Faisabilité du protocole *",
-                                           levels, index=None)
+                comment_logistique = st.text_area("Commentaire(s) :", key='comment_logistique')
 
-            comment_logistique = st.text_area("Commentaire(s) :", key='comment_logistique')
+                if st.form_submit_button("Enregistrer"):
+                    mandatory_fields = [reviewer, equipe,
+                                        objectif, coherence,
+                                        sources, vocabulaire,
+                                        facteurs, conditions, repetitions, temoins,
+                                        precision_methodes, homogeneite_methodes, danger_methodes,
+                                        stockage, analyse,
+                                        forme, orthographe, schemas, materiel, planning, faisabilite]
 
-            if st.form_submit_button("Enregistrer"):
-                mandatory_fields = [reviewer, equipe,
-                                    objectif, coherence,
-                                    sources, vocabulaire,
-                                    facteurs, conditions, repetitions, temoins,
-                                    precision_methodes, homogeneite_methodes, danger_methodes,
-                                    stockage, analyse,
-                                    forme, orthographe, schemas, materiel, planning, faisabilite]
+                    if any(field is None for field in mandatory_fields):
+                        st.error(MANDATORY_FIELDS_MISSING)
+                    else:
+                        new_row = {
+                            "reviewer": str(reviewer),
+                            "equipe": str(equipe),
+                            "objectif": objectif,
+                            "coherence": coherence,
+                            "sources": sources,
+                            "vocabulaire": vocabulaire,
+                            "facteurs": facteurs,
+                            "conditions": conditions,
+                            "repetitions": repetitions,
+                            "temoins": temoins,
+                            "precision_methodes": precision_methodes,
+                            "homogeneite_methodes": homogeneite_methodes,
+                            "danger_methodes": danger_methodes,
+                            "stockage": stockage,
+                            "analyse": analyse,
+                            "forme": forme,
+                            "orthographe": orthographe,
+                            "schemas": schemas,
+                            "materiel": materiel,
+                            "planning": planning,
+                            "faisabilite": faisabilite,
+                            "comment_objectif": comment_objectif,
+                            "comment_sources": comment_sources,
+                            "comment_traitement": comment_traitement,
+                            "comment_mesures": comment_mesures,
+                            "comment_donnees": comment_donnees,
+                            "comment_forme": comment_forme,
+                            "comment_logistique": comment_logistique,
+                        }
 
-                if any(field is None for field in mandatory_fields):
-                    st.error(MANDATORY_FIELDS_MISSING)
-                else:
-                    new_row = {
-                        "reviewer": str(reviewer),
-                        "equipe": str(equipe),
-                        "objectif": objectif,
-                        "coherence": coherence,
-                        "sources": sources,
-                        "vocabulaire": vocabulaire,
-                        "facteurs": facteurs,
-                        "conditions": conditions,
-                        "repetitions": repetitions,
-                        "temoins": temoins,
-                        "precision_methodes": precision_methodes,
-                        "homogeneite_methodes": homogeneite_methodes,
-                        "danger_methodes": danger_methodes,
-                        "stockage": stockage,
-                        "analyse": analyse,
-                        "forme": forme,
-                        "orthographe": orthographe,
-                        "schemas": schemas,
-                        "materiel": materiel,
-                        "planning": planning,
-                        "faisabilite": faisabilite,
-                        "comment_objectif": comment_objectif,
-                        "comment_sources": comment_sources,
-                        "comment_traitement": comment_traitement,
-                        "comment_mesures": comment_mesures,
-                        "comment_donnees": comment_donnees,
-                        "comment_forme": comment_forme,
-                        "comment_logistique": comment_logistique,
-                    }
+                        save_data(PEER_REVIEW, new_row)
 
-                    save_data(PEER_REVIEW, new_row)
+        form_peer_review()
 
         show_data(PEER_REVIEW, "Evaluation par les pairs des protocoles")
     else:
         st.write("### " + FORM_REVIEW[1])
 
-        left, right = st.columns(2)
+        @st.fragment
+        @profiled
+        def consult_reviews():
+            left, right = st.columns(2)
 
-        with left:
-            equipe = st.selectbox("Indiquez le numéro de votre équipe",
-                                  list(range(1, 90)),
-                                  index=None)
+            with left:
+                equipe = st.selectbox("Indiquez le numéro de votre équipe",
+                                      list(range(1, 90)),
+                                      index=None)
 
-        peer_reviews = get_df_from_url('peer_review')
+            peer_reviews = get_df_from_url(PEER_REVIEW, columns=REVIEW_LEVEL_COLUMNS)
 
-        if equipe is not None:
-            peer_reviews = peer_reviews[peer_reviews['equipe'] == equipe]
+            if equipe is not None:
+                peer_reviews = peer_reviews[peer_reviews['equipe'] == equipe]
 
-            def display_levels(column_name):
-                niveau = peer_reviews[column_name]
+                def display_levels(column_name):
+                    niveau = peer_reviews[column_name]
 
-                results = pd.DataFrame({
-                    "niveau": levels,
-                    "nombre": [len(niveau[niveau == level]) for level in levels],
-                })
+                    results = pd.DataFrame({
+                        "niveau": levels,
+                        "nombre": [len(niveau[niveau == level]) for level in levels],
+                    })
 
-                st.bar_chart(results, x="niveau", y="nombre", sort=False,
-                             x_label="", height=250)
+                    st.bar_chart(results, x="niveau", y="nombre", sort=False,
+                                 x_label="", height=250)
 
-            def display_comments(column_name):
-                comments = [c for c in peer_reviews[column_name] if c is not None and type(c) is not float and len(str(c)) > 0]
+                def display_comments(column_name):
+                    reviews = get_df_from_url(PEER_REVIEW, columns=["equipe", column_name])
+                    if column_name not in reviews.columns:
+                        st.write("Aucun commentaire.")
+                        return
+                    reviews = reviews[reviews['equipe'] == equipe]
+                    comments = [c for c in reviews[column_name] if c is not None and type(c) is not float and len(str(c)) > 0]
 
-                if len(comments) == 0:
-                    st.write("Aucun commentaire.")
-                else:
-                    for i, comment in enumerate(comments):
-                        st.write("###### Commentaire n°{0}".format(i+1))
-                        st.write(comment)
+                    if len(comments) == 0:
+                        st.write("Aucun commentaire.")
+                    else:
+                        for i, comment in enumerate(comments):
+                            st.write("###### Commentaire n°{0}".format(i+1))
+                            st.write(comment)
+
+                if len(peer_reviews) > 0:
+                    st.write("Il y a **{0}** reviews pour l'équipe n° {1}.".format(len(peer_reviews), equipe))
+
+                    global_results = pd.DataFrame({
+                        "niveau": levels,
+                        "nombre": [sum(sum(peer_reviews.eq(level).values)) for level in levels]
+                    })
 
-            if len(peer_reviews) > 0:
-                st.write("Il y a **{0}** reviews pour l'équipe n° {1}.".format(len(peer_reviews), equipe))
+                    st.write("#### Résultats globaux")
 
-                global_results = pd.DataFrame({
-                    "niveau": levels,
-                    "nombre": [sum(sum(peer_reviews.eq(level).values)) for level in levels]
-                })
+                    st.bar_chart(global_results, x="niveau", y="nombre", sort=False,
+                                 x_label="", height=250)
 
-                st.write("#### Résultats globaux")
+                    st.write("Cliquez sur chaque section ci-dessous pour découvrir le détail de l'évaluation de vos pairs et leurs commentaires.")
 
-                st.bar_chart(global_results, x="niveau", y="nombre", sort=False,
-                             x_label="", height=250)
+                    with st.expander("🎯 Objectif de l'expérience", key="section_comment_objectif",
+                                     on_change="rerun") as section:
+                        st.write("##### Clarté de l'objectif")
 
-                st.write("Cliquez sur chaque section ci-dessous pour découvrir le détail de l'évaluation de vos pairs et leurs commentaires.")
+                        display_levels("objectif")
 
-                with st.expander("🎯 Objectif de l'expérience"):
-                    st.write("##### Clarté de l'objectif")
+                        st.write("##### Cohérence entre le protocole et l'objectif de l'expérience ")
 
-                    display_levels("objectif")
+                        display_levels("coherence")
 
-                    st.write("##### Cohérence entre le protocole et l'objectif de l'expérience ")
+                        st.write("##### Commentaire(s)")
 
-                    display_levels("coherence")
+                        if section.open:
+                            display_comments("comment_objectif")
 
-                    st.write("##### Commentaire(s)")
+                    with st.expander("📰 Vocabulaires et ressources", key="section_comment_sources",
+                                     on_change="rerun") as section:
+                        st.write("##### Sources scientifiques")
 
-                    display_comments("comment_objectif")
+                        display_levels("sources")
 
-                with st.expander("📰 Vocabulaires et ressources"):
-                    st.write("##### Sources scientifiques")
+                        st.write("##### Vocabulaire")
 
-                    display_levels("sources")
+                        display_levels("vocabulaire")
 
-                    st.write("##### Vocabulaire")
+                        st.write("##### Commentaire(s)")
 
-                    display_levels("vocabulaire")
+                        if section.open:
+                            display_comments("comment_sources")
 
-                    st.write("##### Commentaire(s)")
+                    with st.expander("🧪 Traitements et conditions expérimentales", key="section_comment_traitement",
+                                     on_change="rerun") as section:
+                        st.write("##### Facteurs et niveaux testés")
 
-                    display_comments("comment_sources")
+                        display_levels("facteurs")
 
-                with st.expander("🧪 Traitements et conditions expérimentales"):
-                    st.write("##### Facteurs et niveaux testés")
+                        st.write("##### Conditions expérimentales (facteurs non-testés)")
 
-                    display_levels("facteurs")
+                        display_levels("conditions")
 
-                    st.write("##### Conditions expérimentales (facteurs non-testés)")
+                        st.write("##### Nombre de répétitions")
 
-                    display_levels("conditions")
+                        display_levels("repetitions")
 
-                    st.write("##### Nombre de répétitions")
+                        st.write("##### Témoins")
 
-                    display_levels("repetitions")
+                        display_levels("temoins")
 
-                    st.write("##### Témoins")
+                        st.write("##### Commentaire(s)")
 
-                    display_levels("temoins")
+                        if section.open:
+                            display_comments("comment_traitement")
 
-                    st.write("##### Commentaire(s)")
+                    with st.expander("📏 Variables mesurées", key="section_comment_mesures",
+                                     on_change="rerun") as section:
+                        st.write("##### Précision des méthodes de mesure")
 
-                    display_comments("comment_traitement")
+                        display_levels("precision_methodes")
 
-                with st.expander("📏 Variables mesurées"):
-                    st.write("##### Précision des méthodes de mesure")
+                        st.write("##### Homogénéité des méthodes de mesure")
 
-                    display_levels("precisions_methodes")
+                        display_levels("homogeneite_methodes")
 
-                    st.write("##### Homogénéité des méthodes de mesure")
+                        st.write("##### Danger des méthodes de mesure pour la plante")
 
-                    display_levels("homogeneite_methodes")
+                        display_levels("danger_methodes")
 
-                    st.write("##### Danger des méthodes de mesure pour la plante")
+                        st.write("##### Commentaire(s)")
 
-                    display_levels("danger_methodes")
+                        if section.open:
+                            display_comments("comment_mesures")
 
-                    st.write("##### Commentaire(s)")
+                    with st.expander("📈 Gestions des données", key="section_comment_donnees",
+                                     on_change="rerun") as section:
+                        st.write("##### Stockage des données")
 
-                    display_comments("comment_mesures")
+                        display_levels("stockage")
 
-                with st.expander("📈 Gestions des données"):
-                    st.write("##### Stockage des données")
+                        st.write("##### Analyse des données")
 
-                    display_levels("stockage")
+                        display_levels("analyse")
 
-                    st.write("##### Analyse des données")
+                        st.write("##### Commentaire(s)")
 
-                    display_levels("analyse")
+                        if section.open:
+                            display_comments("comment_donnees")
 
-                    st.write("##### Commentaire(s)")
+                    with st.expander("👓 Forme du protocole", key="section_comment_forme",
+                                     on_change="rerun") as section:
+                        st.write("##### Forme du texte")
 
-                    display_comments("comment_donnees")
+                        display_levels("forme")
 
-                with st.expander("👓 Forme du protocole"):
-                    st.write("##### Forme du texte")
+                        st.write("##### Orthographe")
 
-                    display_levels("forme")
+                        display_levels("orthographe")
 
-                    st.write("##### Orthographe")
+                        st.write("##### Schémas")
 
-                    display_levels("orthographe")
+                        display_levels("schemas")
 
-                    st.write("##### Schémas")
+                        st.write("##### Commentaire(s)")
 
-                    display_levels("schemas")
+                        if section.open:
+                            display_comments("comment_forme")
 
-                    st.write("##### Commentaire(s)")
+                    with st.expander("‍🧑‍🏭 Logistique", key="section_comment_logistique",
+                                     on_change="rerun") as section:
+                        st.write("##### Matériel")
 
-                    display_comments("comment_forme")
+                        display_levels("materiel")
 
-                with st.expander("‍🧑‍🏭 Logistique"):
-                    st.write("##### Matériel")
+                        st.write("##### Planning de l'expérience")
 
-                    display_levels("materiel")
+                        display_levels("planning")
 
-                    st.write("##### Planning de l'expérience")
+                        st.write("##### Faisabilité du protocole")
 
-                    display_levels("planning")
+                        display_levels("faisabilite")
 
-                    st.write("##### Faisabilité du protocole")
+                        st.write("##### Commentaire(s)")
+
+                        if section.open:
+                            display_comments("comment_logistique")
+                else:
+                    st.write("Il n'y a **pas encore** de review pour votre équipe 🙁. Revenez plus tard !")
 
-                    display_levels("faisabilite")
+        consult_reviews()
 
-                    st.write("##### Commentaire(s)")
+# Onglet réservé aux administrateurs : instrumentation et profils
+if is_admin():
+    with tabs[4]:
+        show_admin()
 
-                    display_comments("comment_logistique")
-            else:
-                st.write("Il n'y a **pas encore** de review pour votre équipe 🙁. Revenez plus tard !")
+if profiler is not None:
+    stop_profiling(profiler)
 
+# Fin du premier passage du script : le premier affichage est envoyé au navigateur
+mark_startup("premier affichage")
+if not _startup_timeline()["rapport_affiche"]:
+    _startup_timeline()["rapport_affiche"] = True
+    print(startup_report(), flush=True)
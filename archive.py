@@ -0,0 +1,163 @@
+"""Partitionnement par année académique et archivage des anciennes lignes au format Parquet.
+
+Les lignes sont ajoutées aux feuilles dans l'ordre chronologique : les années passées forment donc le
+début de chaque feuille. On archive ce préfixe dans un fichier Parquet compressé par feuille et par année
+(<dossier>/<feuille>/annee=2024-2025.parquet) et on note dans un manifeste sa longueur et la dernière année
+archivée : le chargement courant ne lit plus que les lignes qui suivent. Seules les feuilles datées sont
+archivées (les autres, comme les pièces, sont référencées par la cohorte en cours).
+
+Le nombre de lignes archivées n'est fiable que si le début de la feuille n'a pas changé : à chaque lecture,
+la dernière ligne archivée est relue avec les suivantes et sa date est vérifiée (voir read_unarchived).
+"""
+import json
+import os
+
+import pandas as pd
+
+MANIFEST = "manifest.json"
+
+# L'année académique commence en septembre
+SEPTEMBER = 9
+
+
+def academic_year(dates):
+    """Année académique ("2024-2025") de dates au format JJ/MM/AAAA (<NA> si la date est invalide)"""
+    parsed = pd.to_datetime(pd.Series(dates, dtype="string"), format="%d/%m/%Y", errors="coerce")
+    debut = (parsed.dt.year - (parsed.dt.month < SEPTEMBER)).astype("Int64")
+    return debut.astype("string") + "-" + (debut + 1).astype("string")
+
+
+def current_academic_year(now):
+    debut = now.year - (now.month < SEPTEMBER)
+    return f"{debut}-{debut + 1}"
+
+
+def archivable_prefix(df, date_column, year):
+    """Nombre de lignes au début de df qui appartiennent à l'année `year` ou à une année antérieure"""
+    if date_column not in df.columns:
+        return 0
+    archivable = (academic_year(df[date_column]) <= year).fillna(False)
+    return int(archivable.astype(bool).cummin().sum())
+
+
+def read_manifest(directory):
+    """Par feuille : {"lignes": nombre de lignes archivées, "annee": dernière année archivée}"""
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_manifest(directory, manifest):
+    path = os.path.join(directory, MANIFEST)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def archive_boundary(directory, key):
+    """Lignes archivées au début de la feuille et dernière année archivée : (nombre de lignes, année ou None)"""
+    entry = read_manifest(directory).get(key)
+    if entry is None:
+        return 0, None
+    if isinstance(entry, int):
+        # Manifeste d'une version précédente : seul le nombre de lignes y était noté
+        annees = list_archives(directory).get(key)
+        return entry, annees[-1] if annees else None
+    return entry["lignes"], entry["annee"]
+
+
+def _still_archived(df, date_column, year):
+    """Vrai si la 1ère ligne de df (dernière ligne archivée) appartient toujours à une année archivée"""
+    if df.empty or date_column not in df.columns:
+        return False
+    annee = academic_year(df[date_column].iloc[:1]).iloc[0]
+    return not pd.isna(annee) and annee <= year
+
+
+def read_unarchived(download, directory, key, date_column, before_reload=None):
+    """Lit les lignes non archivées d'une feuille ; download(skip_rows) retourne un DataFrame.
+
+    Les lignes archivées ne sont pas téléchargées, sauf la dernière, dont la date est vérifiée. Si elle
+    n'appartient plus à une année archivée, des lignes ont été supprimées ou déplacées depuis l'archivage :
+    la feuille est relue en entier (before_reload est appelé avant) et seules les lignes des années archivées
+    en sont écartées, d'après leur date. Les feuilles sans date ne sont jamais archivées.
+    """
+    lignes, annee = archive_boundary(directory, key) if date_column is not None else (0, None)
+    if lignes == 0:
+        return download(0)
+    if annee is not None:
+        df = download(lignes - 1)
+        if _still_archived(df, date_column, annee):
+            return df.iloc[1:].reset_index(drop=True)
+    # Début de la feuille modifié (ou année archivée inconnue) : relecture complète, filtrée par date
+    if before_reload is not None:
+        before_reload()
+    df = download(0)
+    if annee is None or date_column not in df.columns:
+        return df
+    archivee = (academic_year(df[date_column]) <= annee).fillna(False).astype(bool)
+    return df[~archivee].reset_index(drop=True)
+
+
+def _partition_path(directory, key, year):
+    return os.path.join(directory, key, f"annee={year}.parquet")
+
+
+def archive_rows(directory, key, df, date_column, year):
+    """Archive les lignes de df (feuille complète) des années <= `year` qui ne le sont pas encore.
+
+    Retourne le nombre de lignes archivées. Lève ValueError pour une feuille sans date.
+    """
+    if date_column is None:
+        raise ValueError(f"la feuille {key} n'est pas datée : elle n'est pas archivée")
+    manifest = read_manifest(directory)
+    enregistrees, annee_archivee = archive_boundary(directory, key)
+    deja = enregistrees
+    if deja > 0 and annee_archivee is not None and not _still_archived(df.iloc[deja - 1:], date_column, annee_archivee):
+        # Des lignes ont été supprimées ou déplacées au début de la feuille depuis le dernier archivage :
+        # les lignes déjà archivées sont celles des années archivées au début de la feuille
+        deja = archivable_prefix(df, date_column, annee_archivee)
+    fin = archivable_prefix(df, date_column, year)
+    if fin <= deja:
+        # Rien de nouveau à archiver, mais la limite corrigée est enregistrée (sinon chaque lecture
+        # relirait la feuille en entier)
+        if deja != enregistrees:
+            manifest[key] = {"lignes": deja, "annee": annee_archivee}
+            _write_manifest(directory, manifest)
+        return 0
+
+    rows = df.iloc[deja:fin]
+    # Les colonnes de texte sont écrites telles quelles (Parquet n'accepte pas les colonnes de types mélangés)
+    rows = rows.astype({col: str for col in rows.columns if rows[col].dtype == object})
+
+    annees = academic_year(rows[date_column])
+
+    os.makedirs(os.path.join(directory, key), exist_ok=True)
+    for annee, partition in rows.groupby(annees.to_numpy()):
+        path = _partition_path(directory, key, annee)
+        if os.path.exists(path):
+            partition = pd.concat([pd.read_parquet(path), partition], ignore_index=True)
+        partition.to_parquet(path + ".tmp", compression="zstd", index=False)
+        os.replace(path + ".tmp", path)
+
+    manifest[key] = {"lignes": fin, "annee": max(year, annee_archivee) if annee_archivee else year}
+    _write_manifest(directory, manifest)
+    return fin - deja
+
+
+def list_archives(directory):
+    """Années archivées par feuille"""
+    archives = {}
+    if not os.path.isdir(directory):
+        return archives
+    for key in sorted(os.listdir(directory)):
+        if os.path.isdir(os.path.join(directory, key)):
+            archives[key] = sorted(name[len("annee="):-len(".parquet")]
+                                   for name in os.listdir(os.path.join(directory, key)) if name.endswith(".parquet"))
+    return archives
+
+
+def read_archive(directory, key, year):
+    return pd.read_parquet(_partition_path(directory, key, year))
@@ -0,0 +1,67 @@
+"""Mesure du démarrage à froid de l'application.
+
+Chaque mesure lance un nouvel interpréteur Python qui exécute une première fois app.py
+(via streamlit.testing), comme lors du réveil de l'application après une mise en veille.
+Le script échoue (code de sortie 1) si la médiane dépasse le budget.
+
+Usage :
+    python benchmarks/cold_start.py [--budget 4.0] [--repeat 5]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+APP = Path(__file__).resolve().parent.parent / "app.py"
+
+# Budget de démarrage à froid (en secondes) : import de Streamlit + 1er passage du script
+COLD_START_BUDGET = 4.0
+
+RUN_APP = """
+import time
+debut = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=60)
+at.run()
+print("__COLD_START__", time.perf_counter() - debut)
+"""
+
+
+def measure_once():
+    """Lance un démarrage à froid dans un nouveau processus et retourne sa durée et sa sortie"""
+    result = subprocess.run([sys.executable, "-c", RUN_APP.format(app=str(APP))],
+                            cwd=APP.parent, capture_output=True, text=True, check=True)
+    duree = None
+    for line in result.stdout.splitlines():
+        if line.startswith("__COLD_START__"):
+            duree = float(line.split()[1])
+    return duree, result.stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=COLD_START_BUDGET,
+                        help="budget de démarrage à froid en secondes")
+    parser.add_argument("--repeat", type=int, default=5, help="nombre de démarrages mesurés")
+    args = parser.parse_args()
+
+    durees = []
+    for i in range(args.repeat):
+        duree, sortie = measure_once()
+        durees.append(duree)
+        if i == 0:
+            # La chronologie détaillée est imprimée par app.py lors du premier affichage
+            print("\n".join(line for line in sortie.splitlines() if not line.startswith("__COLD_START__")))
+
+    mediane = statistics.median(durees)
+    print(f"Démarrage à froid : médiane {mediane:.3f} s, min {min(durees):.3f} s, max {max(durees):.3f} s "
+          f"({args.repeat} mesures, budget {args.budget:.1f} s)")
+
+    if mediane > args.budget:
+        print("Budget de démarrage à froid dépassé !")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
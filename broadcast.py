@@ -0,0 +1,39 @@
+"""Canal de diffusion (publication/abonnement) entre les sessions d'un même processus Streamlit.
+
+Après un enregistrement, la session qui a écrit publie les lignes ajoutées ; les abonnés (par exemple le
+cache partagé des feuilles) se mettent à jour en mémoire, sans relire les Google Sheets.
+"""
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class Channel:
+    """Canal de diffusion synchrone : les abonnés sont appelés dans le fil de la publication,
+    l'un après l'autre (deux publications ne sont jamais traitées en même temps)."""
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.RLock()
+
+    def subscribe(self, callback):
+        """Abonne callback(topic, payload) et retourne une fonction de désabonnement"""
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def publish(self, topic, payload):
+        """Transmet payload à tous les abonnés. L'erreur d'un abonné n'empêche pas les autres d'être servis."""
+        with self._lock:
+            for callback in list(self._subscribers):
+                try:
+                    callback(topic, payload)
+                except Exception:
+                    logger.exception("Erreur d'un abonné lors de la diffusion de %s", topic)
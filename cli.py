@@ -0,0 +1,265 @@
+"""Synchronisation des Google Sheets et calculs dérivés en ligne de commande, sans l'interface Streamlit.
+
+    python cli.py sync [--format csv xlsx] [--workers 4] [--force] [--analyses] [table ...]
+    python cli.py analyses [--debut AAAA-MM-JJ]
+
+`sync` télécharge les tables en parallèle (dans la limite du quota de l'API Google) et en garde un
+instantané local au format Parquet, avec le même chargement et la même conversion des types que
+l'application. Une table dont la révision Drive n'a pas changé depuis le dernier instantané n'est pas
+téléchargée à nouveau. `analyses` calcule les tables dérivées (IRGA, croissance des tournesols,
+évaluations par les pairs) à partir des instantanés, sans connexion.
+
+Les secrets sont ceux de l'application (.streamlit/secrets.toml par défaut). Le limiteur de débit de la
+ligne de commande ne voit pas les requêtes de l'application, qui utilise le même compte de service : il est
+réglé par défaut à la moitié du quota de l'application ([quota] cli_requests_per_minute dans les secrets).
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import tomllib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from analyses import growth_summary, growth_table, irga_by_treatment, irga_quantities, review_counts, review_scores
+from archive import read_unarchived
+from completeness import CompletenessTracker, default_term_start, week_of
+from rate_limiter import TokenBucket, READ
+from sheets import (DATASETS, DATE_COLUMNS, INSCRIPTION, OBS_FEUILLE, OBS_PLANTE, PEER_REVIEW, PIECE,
+                    SHEETS_BURST, SHEETS_REQUESTS_PER_CALL, SHEETS_REQUESTS_PER_MINUTE,
+                    archive_dir, fetch_revision, make_credentials, read_worksheet, to_arrow, to_excel, write_csv)
+
+TIME_ZONE = ZoneInfo('Europe/Brussels')
+
+SNAPSHOTS_DIR = "instantanes"
+SNAPSHOTS_MANIFEST = "instantanes.json"
+ANALYSES_DIR = "analyses"
+
+
+def load_secrets(path):
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+def read_snapshots_manifest(directory):
+    path = os.path.join(directory, SNAPSHOTS_MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_atomic(path, write):
+    """Écrit un fichier via write(fichier) dans un fichier temporaire, puis le met en place"""
+    with open(path + ".tmp", "wb") as f:
+        write(f)
+    os.replace(path + ".tmp", path)
+
+
+# --- SYNCHRONISATION ---
+def cli_quota(secrets):
+    """(requêtes par minute, rafale) du limiteur de la ligne de commande.
+
+    Ce limiteur ignore les requêtes de l'application, qui partage le quota du même compte de service : par
+    défaut, la ligne de commande n'en prend que la moitié. Lève ValueError si le quota ne permet pas une lecture.
+    """
+    quota = secrets.get("quota", {})
+    requests_per_minute = quota.get("cli_requests_per_minute",
+                                    quota.get("requests_per_minute", SHEETS_REQUESTS_PER_MINUTE) // 2)
+    burst = min(quota.get("burst", SHEETS_BURST), requests_per_minute // 2)
+    if burst < SHEETS_REQUESTS_PER_CALL:
+        raise ValueError(f"quota de la ligne de commande trop bas ({requests_per_minute} requêtes par minute, "
+                         f"rafale de {burst}) : chaque lecture coûte {SHEETS_REQUESTS_PER_CALL} requêtes, il faut "
+                         f"au moins {2 * SHEETS_REQUESTS_PER_CALL} requêtes par minute et une rafale d'au moins "
+                         f"{SHEETS_REQUESTS_PER_CALL} ([quota] cli_requests_per_minute et burst dans les secrets)")
+    return requests_per_minute, burst
+
+
+class Syncer:
+    """Télécharge les tables et écrit leurs instantanés ; partagé par les fils d'exécution"""
+
+    def __init__(self, secrets, directory, formats, force):
+        import gspread
+        from google.auth.transport.requests import AuthorizedSession
+
+        self.sks = secrets["connections"]["gsheets"]
+        self.directory = directory
+        self.formats = formats
+        self.force = force
+
+        credentials = make_credentials(self.sks)
+        self.authorize = lambda: gspread.authorize(credentials)
+        self.session_factory = lambda: AuthorizedSession(credentials)
+        self.local = threading.local()
+
+        self.limiter = TokenBucket(*cli_quota(secrets))
+        self.archive_dir = archive_dir(secrets)
+        self.previous = read_snapshots_manifest(directory)
+
+    def _thread_client(self):
+        """Client gspread et session Drive propres à chaque fil d'exécution"""
+        if not hasattr(self.local, "client"):
+            self.local.client = self.authorize()
+            self.local.session = self.session_factory()
+        return self.local.client, self.local.session
+
+    def _wait_for_quota(self):
+        """Attend son tour sans limite de durée : une synchronisation complète dépasse la minute à mi-quota"""
+        self.limiter.acquire(READ, SHEETS_REQUESTS_PER_CALL)
+
+    def sync(self, key):
+        """Retourne (statut, entrée du manifeste des instantanés)"""
+        if key not in self.sks:
+            return "absente des secrets", None
+
+        client, session = self._thread_client()
+        url = self.sks[key]
+        parquet_path = os.path.join(self.directory, f"{key}.parquet")
+
+        revision = fetch_revision(session, url)
+        previous = self.previous.get(key)
+        if not self.force and revision is not None and previous is not None \
+                and previous["revision"] == revision and os.path.exists(parquet_path):
+            return "inchangée", previous
+
+        self._wait_for_quota()
+        worksheet = client.open_by_url(url).sheet1
+        df = read_unarchived(lambda skip_rows: read_worksheet(worksheet, skip_rows), self.archive_dir, key,
+                             DATE_COLUMNS[key], before_reload=self._wait_for_quota)
+
+        import pyarrow.parquet as pq
+        table = to_arrow(df)
+        _write_atomic(parquet_path, lambda f: pq.write_table(table, f, compression="zstd"))
+        if "csv" in self.formats:
+            _write_atomic(os.path.join(self.directory, f"{key}.csv"), lambda f: write_csv(df, f))
+        if "xlsx" in self.formats:
+            _write_atomic(os.path.join(self.directory, f"{key}.xlsx"), lambda f: f.write(to_excel(df)))
+
+        return "téléchargée", {"revision": revision, "lignes": len(df), "colonnes": len(df.columns),
+                               "date": datetime.now(TIME_ZONE).isoformat(timespec="seconds")}
+
+
+def sync(secrets, directory, tables, formats=(), workers=4, force=False):
+    """Synchronise les tables en parallèle ; retourne le nombre d'échecs"""
+    os.makedirs(directory, exist_ok=True)
+    syncer = Syncer(secrets, directory, formats, force)
+    manifest = dict(syncer.previous)
+    echecs = 0
+
+    debut = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(syncer.sync, key): key for key in tables}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                statut, entry = future.result()
+            except Exception as e:
+                echecs += 1
+                print(f"  {key:<16} ERREUR : {e}", file=sys.stderr)
+                continue
+            if entry is not None:
+                manifest[key] = entry
+            lignes = f"{entry['lignes']} lignes" if entry is not None else ""
+            print(f"  {key:<16} {statut:<20} {lignes}")
+
+    _write_atomic(os.path.join(directory, SNAPSHOTS_MANIFEST),
+                  lambda f: f.write(json.dumps(manifest, indent=2, ensure_ascii=False).encode("utf-8")))
+    print(f"{len(tables)} table(s) en {time.perf_counter() - debut:.1f} s, {echecs} échec(s)")
+    return echecs
+
+
+# --- ANALYSES ---
+def read_snapshot(directory, key):
+    path = os.path.join(directory, f"{key}.parquet")
+    return pd.read_parquet(path) if os.path.exists(path) else pd.DataFrame()
+
+
+def run_analyses(directory, debut, out=None):
+    """Calcule les tables dérivées à partir des instantanés et les écrit au format .csv dans out"""
+    out = out or os.path.join(directory, ANALYSES_DIR)
+    os.makedirs(out, exist_ok=True)
+
+    irga = read_snapshot(directory, "url_irga")
+    inscriptions = read_snapshot(directory, INSCRIPTION)
+    observations = read_snapshot(directory, OBS_PLANTE)
+    pieces = read_snapshot(directory, PIECE)
+    feuilles = read_snapshot(directory, OBS_FEUILLE)
+    reviews = read_snapshot(directory, PEER_REVIEW)
+
+    semaine = int(week_of([datetime.now(TIME_ZONE).strftime("%d/%m/%Y")], debut).iloc[0])
+    tracker = CompletenessTracker.from_frames(debut, inscriptions, observations, pieces, feuilles)
+
+    resultats = {
+        "irga_mesures": irga_quantities(irga) if not irga.empty else pd.DataFrame(),
+        "irga_par_traitement": irga_by_treatment(irga) if not irga.empty else pd.DataFrame(),
+        "croissance_par_semaine": growth_table(observations, debut).reset_index(),
+        "croissance_tournesols": growth_summary(observations, pieces, debut),
+        "suivi_tournesols": tracker.summary(semaine).join(tracker.matrix(semaine)).rename_axis("plante_ID")
+                                                     .reset_index(),
+        "evaluations_par_critere": review_counts(reviews),
+        "evaluations_scores": review_scores(reviews),
+    }
+
+    for name, df in resultats.items():
+        _write_atomic(os.path.join(out, f"{name}.csv"), lambda f: write_csv(df, f))
+        print(f"  {name + '.csv':<30} {len(df)} lignes")
+
+
+def term_start(args, secrets):
+    if args.debut:
+        return pd.Timestamp(args.debut)
+    if secrets.get("debut_quadrimestre"):
+        return pd.Timestamp(secrets["debut_quadrimestre"])
+    return default_term_start(datetime.now(TIME_ZONE))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--secrets", default=os.path.join(".streamlit", "secrets.toml"),
+                        help="fichier des secrets de l'application")
+    parser.add_argument("--dossier", default=SNAPSHOTS_DIR, help="dossier des instantanés")
+    commands = parser.add_subparsers(dest="commande", required=True)
+
+    sync_parser = commands.add_parser("sync", help="télécharger les tables dans des instantanés locaux")
+    sync_parser.add_argument("tables", nargs="*", metavar="table",
+                             help=f"tables à synchroniser (par défaut toutes : {', '.join(DATASETS)})")
+    sync_parser.add_argument("--format", nargs="*", default=[], choices=["csv", "xlsx"],
+                             help="formats écrits en plus du Parquet")
+    sync_parser.add_argument("--workers", type=int, default=4, help="téléchargements simultanés")
+    sync_parser.add_argument("--force", action="store_true", help="télécharger même les tables inchangées")
+    sync_parser.add_argument("--analyses", action="store_true", help="calculer ensuite les tables dérivées")
+    sync_parser.add_argument("--debut", help="lundi de la semaine S1 (AAAA-MM-JJ)")
+
+    analyses_parser = commands.add_parser("analyses", help="calculer les tables dérivées depuis les instantanés")
+    analyses_parser.add_argument("--debut", help="lundi de la semaine S1 (AAAA-MM-JJ)")
+    analyses_parser.add_argument("--sortie", help=f"dossier des résultats (par défaut <dossier>/{ANALYSES_DIR})")
+
+    args = parser.parse_args(argv)
+    secrets = load_secrets(args.secrets) if os.path.exists(args.secrets) else {}
+
+    if args.commande == "sync":
+        if "connections" not in secrets:
+            parser.error(f"secrets introuvables ou incomplets : {args.secrets}")
+        inconnues = [table for table in args.tables if table not in DATASETS]
+        if inconnues:
+            parser.error(f"table(s) inconnue(s) : {', '.join(inconnues)}")
+        try:
+            cli_quota(secrets)
+        except ValueError as e:
+            parser.error(str(e))
+        echecs = sync(secrets, args.dossier, args.tables or list(DATASETS), args.format, args.workers, args.force)
+        if args.analyses:
+            run_analyses(args.dossier, term_start(args, secrets))
+        return 1 if echecs else 0
+
+    run_analyses(args.dossier, term_start(args, secrets), args.sortie)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""Suivi de la complétude des observations des tournesols.
+
+Les observations de la plante entière sont attendues chaque semaine du quadrimestre, de S2 à S11, à partir
+de la semaine de réception du tournesol et jusqu'à sa mort éventuelle. La caractérisation de la pièce est
+attendue une fois, les observations des feuilles à la fin de l'expérience.
+
+Les observations sont réparties par semaine et comptées par tournesol (plante_ID × semaine) ; ces
+comptages sont mis à jour au fil des nouvelles lignes, sans tout recalculer.
+"""
+import numpy as np
+import pandas as pd
+
+FIRST_WEEK = 2
+LAST_WEEK = 11
+WEEKS = list(range(FIRST_WEEK, LAST_WEEK + 1))
+
+OBSERVED = "✅"
+MISSING = "❌"
+NOT_EXPECTED = ""
+
+
+def normalize_ids(ids):
+    """Identifiants des tournesols sous forme de texte ("31581300", "31581300_B")"""
+    ids = pd.Series(ids)
+    if pd.api.types.is_numeric_dtype(ids):
+        return ids.astype("Int64").astype("string")
+    return ids.astype("string").str.strip()
+
+
+def default_term_start(now):
+    """Lundi de S1 par défaut : le 2ème lundi de février de l'année académique de `now`"""
+    fevrier = pd.Timestamp(year=now.year + (now.month >= 9), month=2, day=1)
+    return fevrier + pd.Timedelta(days=(7 - fevrier.weekday()) % 7 + 7)
+
+
+def week_of(dates, debut):
+    """Semaine du quadrimestre (S1 = semaine commençant le lundi `debut`) de dates au format JJ/MM/AAAA"""
+    parsed = pd.to_datetime(pd.Series(dates, dtype="string"), format="%d/%m/%Y", errors="coerce")
+    return ((parsed - pd.Timestamp(debut)).dt.days // 7 + 1).astype("Int64")
+
+
+class CompletenessTracker:
+    """Comptage des observations par tournesol et par semaine, et présence des autres encodages"""
+
+    def __init__(self, debut):
+        self.debut = debut
+        self.plants = pd.DataFrame({"semaine_debut": pd.Series(dtype="Int64")})
+        self.counts = pd.DataFrame(0, index=pd.Index([], dtype="string"), columns=WEEKS)
+        self.deaths = pd.Series(dtype="Int64")
+        self.with_piece = set()
+        self.with_leaves = set()
+
+    @classmethod
+    def from_frames(cls, debut, inscriptions, observations, pieces, feuilles):
+        tracker = cls(debut)
+        tracker.add_inscriptions(inscriptions)
+        tracker.add_observations(observations)
+        tracker.add_pieces(pieces)
+        tracker.add_leaves(feuilles)
+        return tracker
+
+    def add_inscriptions(self, df):
+        if "plante_ID" not in df.columns or df.empty:
+            return
+        semaine = week_of(df["date_reception"], self.debut) if "date_reception" in df.columns \
+            else pd.Series(FIRST_WEEK, index=df.index, dtype="Int64")
+        new = pd.DataFrame({"semaine_debut": semaine.clip(lower=FIRST_WEEK).fillna(FIRST_WEEK).to_numpy()},
+                           index=pd.Index(normalize_ids(df["plante_ID"]).to_numpy(), dtype="string"))
+        self.plants = pd.concat([self.plants, new])
+        self.plants = self.plants[~self.plants.index.duplicated(keep="first")]
+
+    def add_observations(self, df):
+        if not {"plante_ID", "date"}.issubset(df.columns) or df.empty:
+            return
+        ids = normalize_ids(df["plante_ID"]).to_numpy()
+        semaines = week_of(df["date"], self.debut).to_numpy()
+
+        # Comptage vectorisé par (tournesol, semaine), ajouté aux comptages existants
+        obs = pd.DataFrame({"plante_ID": ids, "semaine": semaines}).dropna()
+        obs = obs[obs["semaine"].isin(WEEKS)]
+        new_counts = obs.groupby(["plante_ID", "semaine"]).size().unstack(fill_value=0)
+        new_counts = new_counts.reindex(columns=WEEKS, fill_value=0)
+        self.counts = self.counts.add(new_counts, fill_value=0).astype(int)
+
+        if "mort" in df.columns:
+            mort = df["mort"].astype("string").str.upper().isin(["TRUE", "VRAI", "1"]).to_numpy()
+            deaths = pd.Series(semaines[mort], index=ids[mort], dtype="Int64")
+            deaths = pd.concat([self.deaths, deaths])
+            self.deaths = deaths.groupby(level=0).min()
+
+    def add_pieces(self, df):
+        if "plante_ID" in df.columns:
+            self.with_piece.update(normalize_ids(df["plante_ID"]).dropna())
+
+    def add_leaves(self, df):
+        if "plante_ID" in df.columns:
+            self.with_leaves.update(normalize_ids(df["plante_ID"]).dropna())
+
+    def matrix(self, current_week):
+        """Matrice tournesol × semaine : observé, manquant ou non attendu"""
+        plants = self.plants.index
+        counts = self.counts.reindex(index=plants, columns=WEEKS, fill_value=0).to_numpy()
+
+        # Semaines attendues : de la réception à la mort (ou à la semaine en cours)
+        debut = self.plants["semaine_debut"].astype(float).to_numpy()
+        fin = self.deaths.reindex(plants).astype(float).fillna(LAST_WEEK).to_numpy()
+        fin = np.minimum(fin, current_week)
+        semaines = np.array(WEEKS)
+        expected = (semaines >= debut[:, None]) & (semaines <= fin[:, None])
+
+        status = np.where(counts > 0, OBSERVED, np.where(expected, MISSING, NOT_EXPECTED))
+        return pd.DataFrame(status, index=plants, columns=[f"S{w}" for w in WEEKS])
+
+    def summary(self, current_week):
+        """Par tournesol : semaines manquantes, pièce et feuilles encodées"""
+        matrix = self.matrix(current_week)
+        plants = matrix.index
+        leaves_expected = current_week >= LAST_WEEK
+        return pd.DataFrame({
+            "semaines_manquantes": (matrix == MISSING).sum(axis=1),
+            "piece": plants.isin(list(self.with_piece)),
+            "feuilles": plants.isin(list(self.with_leaves)) if leaves_expected else pd.NA,
+        }, index=plants)
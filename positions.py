@@ -0,0 +1,90 @@
+"""Lecture des coordonnées GPS des pièces et regroupement des pièces proches.
+
+Les coordonnées sont encodées en texte libre, en général copiées depuis Google Maps ("50.66628, 4.62025").
+On accepte aussi la virgule décimale ("50,66628; 4,62025" ou "50,66628 4,62025") et les parenthèses ; les
+autres textes, ou les coordonnées hors limites, sont signalés comme invalides.
+
+Les pièces proches sont regroupées sur une grille dont les cellules mesurent environ `radius` mètres de
+côté : deux cellules voisines occupées font partie du même groupe. Le regroupement ne compare donc que
+des cellules voisines, jamais toutes les paires de pièces.
+"""
+import numpy as np
+import pandas as pd
+
+# "50.666, 4.620" ou "50.666 4.620" (point décimal)
+_DOT = r"^\s*\(?\s*(?P<lat>[-+]?\d+(?:\.\d+)?)\s*(?:[,;]\s*|\s+)(?P<lon>[-+]?\d+(?:\.\d+)?)\s*\)?\s*$"
+# "50,666; 4,620" ou "50,666 4,620" (virgule décimale)
+_COMMA = r"^\s*\(?\s*(?P<lat>[-+]?\d+(?:,\d+)?)\s*(?:;\s*|\s+)(?P<lon>[-+]?\d+(?:,\d+)?)\s*\)?\s*$"
+
+METERS_PER_DEGREE = 111_320
+
+
+def parse_positions(positions):
+    """Latitude, longitude et validité (position_valide) de chaque texte de `positions`"""
+    text = pd.Series(positions, dtype="string")
+
+    coords = text.str.extract(_DOT)
+    comma = coords["lat"].isna()
+    coords[comma] = text[comma].str.extract(_COMMA).apply(lambda col: col.str.replace(",", ".", regex=False))
+
+    lat = pd.to_numeric(coords["lat"], errors="coerce").astype(float)
+    lon = pd.to_numeric(coords["lon"], errors="coerce").astype(float)
+    valid = lat.between(-90, 90) & lon.between(-180, 180)
+
+    return pd.DataFrame({
+        "lat": lat.where(valid),
+        "lon": lon.where(valid),
+        "position_valide": valid,
+    }, index=text.index)
+
+
+def cluster_positions(lat, lon, radius):
+    """Numéro de groupe de chaque position valide (<NA> sinon) : cellules de la grille voisines de proche en proche.
+
+    Deux positions à moins de `radius` mètres sont toujours dans le même groupe, mais un groupe peut s'étendre
+    bien au-delà (chaîne de positions proches).
+    """
+    lat = pd.Series(lat, dtype=float)
+    lon = pd.Series(lon, index=lat.index, dtype=float)
+    if lat.notna().sum() == 0:
+        return pd.Series(pd.NA, index=lat.index, dtype="Int64")
+
+    # Cellules de `radius` mètres, en tenant compte du resserrement des méridiens à la latitude moyenne
+    step_lat = radius / METERS_PER_DEGREE
+    step_lon = radius / (METERS_PER_DEGREE * max(np.cos(np.radians(lat.mean())), 0.01))
+    cell_lat = np.floor(lat / step_lat)
+    cell_lon = np.floor(lon / step_lon)
+
+    valid = lat.notna() & lon.notna()
+    cells = pd.DataFrame({"lat": cell_lat[valid], "lon": cell_lon[valid]}).astype(int)
+    occupied = list(cells.drop_duplicates().itertuples(index=False, name=None))
+
+    # Union des cellules occupées voisines (y compris en diagonale)
+    parent = {cell: cell for cell in occupied}
+
+    def root(cell):
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    for i, j in occupied:
+        for d_i, d_j in [(0, 1), (1, -1), (1, 0), (1, 1)]:
+            neighbour = (i + d_i, j + d_j)
+            if neighbour in parent:
+                parent[root(neighbour)] = root((i, j))
+
+    roots = pd.Series([root(cell) for cell in cells.itertuples(index=False, name=None)], index=cells.index)
+    groups = pd.Series(pd.factorize(roots, sort=True)[0], index=cells.index)
+    return groups.reindex(lat.index).astype("Int64")
+
+
+def summarize_clusters(points, cluster_column="groupe"):
+    """Centre, nombre de pièces et valeurs les plus fréquentes (orientation, température) par groupe"""
+    valid = points.dropna(subset=[cluster_column])
+    by = valid.groupby(cluster_column)
+    summary = by.agg(lat=("lat", "mean"), lon=("lon", "mean"), pieces=("lat", "size"))
+    for column in ["orientation", "temp"]:
+        if column in valid.columns:
+            summary[column] = by[column].agg(lambda values: values.mode().iloc[0] if values.notna().any() else pd.NA)
+    return summary.reset_index()
@@ -0,0 +1,135 @@
+"""Profilage par échantillonnage d'une exécution du script Streamlit.
+
+Un fil d'exécution relève périodiquement la pile d'appels du fil qui exécute le script. Les piles sont
+enregistrées au format "collapsed stacks" (une ligne "cadre1;cadre2;...;cadreN nombre" par pile),
+lisible par flamegraph.pl, speedscope ou inferno pour tracer un flame graph.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+PROFILE_SUFFIX = ".folded"
+
+
+class SamplingProfiler:
+    """Échantillonne la pile d'appels d'un fil d'exécution toutes les `interval` secondes.
+
+    Les piles commencent à la fonction `root_function` de `root_filename` quand elle y apparaît (par défaut le
+    module, c'est-à-dire le script ; le nom du fragment pour une ré-exécution de fragment). L'échantillonnage
+    s'arrête de lui-même après `max_duration` secondes si stop() n'est jamais appelé (exécution interrompue).
+    """
+
+    def __init__(self, thread_id=None, interval=0.005, max_duration=120.0, root_filename=None,
+                 root_function="<module>"):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.max_duration = max_duration
+        self.root_filename = root_filename
+        self.root_function = root_function
+        self.samples = Counter()
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._start = None
+
+    def start(self):
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Arrête l'échantillonnage et retourne les piles relevées (Counter pile -> nombre d'échantillons)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._start
+        return self.samples
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None or time.perf_counter() - self._start > self.max_duration:
+                break
+            self.samples[self._stack(frame)] += 1
+
+    def _stack(self, frame):
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            if self.root_filename is not None and code.co_filename == self.root_filename and code.co_name == self.root_function:
+                break
+            frame = frame.f_back
+        return ";".join(reversed(frames))
+
+
+def save_profile(directory, samples, duration, keep, execution=None):
+    """Enregistre un profil dans directory et ne garde que les `keep` profils les plus récents.
+
+    `execution` : nom du fragment profilé (None pour une exécution complète du script).
+    """
+    os.makedirs(directory, exist_ok=True)
+    suffixe = f"_{execution}" if execution else ""
+    name = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}_{duration * 1000:.0f}ms{suffixe}{PROFILE_SUFFIX}"
+    path = os.path.join(directory, name)
+
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, count in samples.most_common():
+            f.write(f"{stack} {count}\n")
+
+    for old in list_profiles(directory)[keep:]:
+        os.remove(old["path"])
+
+    return path
+
+
+def read_profile(path):
+    """Relit un profil : Counter pile -> nombre d'échantillons"""
+    samples = Counter()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            samples[stack] += int(count)
+    return samples
+
+
+def list_profiles(directory):
+    """Profils enregistrés, du plus récent au plus ancien"""
+    if not os.path.isdir(directory):
+        return []
+
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not name.endswith(PROFILE_SUFFIX):
+            continue
+        horodatage, _, reste = name[:-len(PROFILE_SUFFIX)].partition("_")
+        duree, _, execution = reste.partition("_")
+        profiles.append({
+            "nom": name,
+            "path": os.path.join(directory, name),
+            "date": datetime.strptime(horodatage, "%Y%m%d-%H%M%S-%f"),
+            "duree_ms": int(duree.rstrip("ms")),
+            "execution": execution or "script",
+        })
+    return profiles
+
+
+def top_frames(samples, n=15, filename=None, by_function=False):
+    """Cadres les plus coûteux (temps inclusif, en nombre d'échantillons), éventuellement limités à un fichier.
+
+    Par défaut un cadre est une ligne de code ("fonction (fichier:ligne)") ; avec by_function=True,
+    les lignes d'une même fonction sont regroupées ("fonction (fichier)").
+    """
+    inclusive = Counter()
+    for stack, count in samples.items():
+        frames = stack.split(";")
+        if by_function:
+            frames = [frame.rpartition(":")[0] + ")" for frame in frames]
+        for frame in set(frames):
+            if filename is None or f"({filename}" in frame:
+                inclusive[frame] += count
+    return inclusive.most_common(n)
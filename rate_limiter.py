@@ -0,0 +1,92 @@
+"""Limiteur de débit partagé (seau à jetons) pour les appels à l'API Google Sheets.
+
+Toutes les sessions Streamlit d'un même processus partagent le même seau : les requêtes en attente
+sont servies par ordre de priorité (les écritures avant les lectures), puis par ordre d'arrivée.
+"""
+import heapq
+import itertools
+import threading
+import time
+
+# Priorités (la plus petite valeur est servie en premier)
+WRITE = 0
+READ = 1
+LOW = 2
+
+PRIORITY_NAMES = {WRITE: "écritures", READ: "lectures", LOW: "lectures de faible priorité"}
+
+
+class TokenBucket:
+    """Seau à jetons avec file d'attente par priorité.
+
+    Le seau contient au plus `burst` jetons et se remplit au rythme de (requests_per_minute - burst) jetons
+    par minute, de sorte qu'on ne dépasse jamais requests_per_minute requêtes sur une fenêtre d'une minute.
+    """
+
+    def __init__(self, requests_per_minute, burst):
+        if not 0 < burst < requests_per_minute:
+            raise ValueError("burst doit être compris entre 0 et requests_per_minute")
+        self.capacity = burst
+        self.rate = (requests_per_minute - burst) / 60.0
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiting = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _leave(self, entry):
+        self._waiting.remove(entry)
+        heapq.heapify(self._waiting)
+        self._condition.notify_all()
+
+    def acquire(self, priority=READ, tokens=1, blocking=True, timeout=None):
+        """Prend `tokens` jetons. Retourne False si c'est impossible sans attendre (blocking=False)
+        ou dans le délai imparti (timeout, en secondes)."""
+        if tokens > self.capacity:
+            raise ValueError("impossible de prendre plus de jetons que la capacité du seau")
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._condition:
+            self._refill()
+            if not blocking and (self._waiting or self.tokens < tokens):
+                return False
+
+            entry = (priority, next(self._counter))
+            heapq.heappush(self._waiting, entry)
+
+            while True:
+                self._refill()
+                if self._waiting[0] == entry and self.tokens >= tokens:
+                    heapq.heappop(self._waiting)
+                    self.tokens -= tokens
+                    self._condition.notify_all()
+                    return True
+
+                # En tête de file : on attend juste le temps de remplir le seau, sinon notre tour
+                wait = (tokens - self.tokens) / self.rate if self._waiting[0] == entry else 1.0
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._leave(entry)
+                        return False
+                    wait = min(wait, remaining)
+                self._condition.wait(wait)
+
+    def queue_depth(self):
+        """Nombre de requêtes en attente, par priorité"""
+        with self._condition:
+            depth = {priority: 0 for priority in PRIORITY_NAMES}
+            for priority, _ in self._waiting:
+                depth[priority] += 1
+            return depth
+
+    def available(self):
+        """Nombre de jetons disponibles"""
+        with self._condition:
+            self._refill()
+            return self.tokens
@@ -0,0 +1,110 @@
+"""Statistiques courantes (effectif, moyenne, variance, min, max) par groupe, mises à jour au fil des lignes.
+
+Pour chaque variable et chaque groupe (par exemple traitement × rang de feuille), on garde l'effectif n,
+la moyenne, la somme des carrés des écarts à la moyenne (m2, comme dans l'algorithme de Welford) et les
+extrêmes. Un lot de nouvelles lignes est résumé de la même façon puis fusionné avec les statistiques
+existantes (formule de Chan et al., qui se réduit à celle de Welford pour une seule ligne) : le coût d'une
+mise à jour ne dépend que du nombre de nouvelles lignes, jamais de la taille de la feuille.
+"""
+import numpy as np
+import pandas as pd
+
+STATS = ["n", "mean", "m2", "min", "max"]
+
+
+def _merge(a, b):
+    """Fusionne deux tables de statistiques (mêmes niveaux d'index, colonnes STATS)"""
+    a, b = a.align(b, join="outer")
+    a = a.fillna({"n": 0, "m2": 0.0})
+    b = b.fillna({"n": 0, "m2": 0.0})
+
+    n = a["n"] + b["n"]
+    delta = b["mean"].fillna(0.0) - a["mean"].fillna(0.0)
+    part_b = b["n"] / n
+    merged = pd.DataFrame({
+        "n": n,
+        "mean": a["mean"].fillna(0.0) + delta * part_b,
+        "m2": a["m2"] + b["m2"] + delta ** 2 * a["n"] * part_b,
+        "min": np.fmin(a["min"], b["min"]),
+        "max": np.fmax(a["max"], b["max"]),
+    })
+    return merged.astype({"n": int})
+
+
+class RunningStats:
+    """Statistiques des colonnes `variables` par groupe de valeurs des colonnes `groups`"""
+
+    def __init__(self, variables, groups):
+        self.variables = list(variables)
+        self.groups = list(groups)
+        index = pd.MultiIndex.from_arrays([[]] * (len(self.groups) + 1), names=["variable"] + self.groups)
+        self.table = pd.DataFrame({stat: pd.Series(dtype=float) for stat in STATS}, index=index).astype({"n": int})
+
+    @classmethod
+    def from_frame(cls, df, variables, groups):
+        stats = cls(variables, groups)
+        stats.add(df)
+        return stats
+
+    def _long(self, df):
+        """Valeurs numériques de df au format long : une ligne par (variable, groupe, valeur)"""
+        variables = [var for var in self.variables if var in df.columns]
+        if df.empty or not variables:
+            return None
+
+        keys = {}
+        for group in self.groups:
+            col = df[group] if group in df.columns else pd.Series(pd.NA, index=df.index)
+            if pd.api.types.is_numeric_dtype(col):
+                keys[group] = col.astype("Float64").round().astype("Int64")
+            else:
+                keys[group] = col.astype("string").str.strip()
+
+        values = pd.DataFrame({
+            var: pd.to_numeric(df[var].astype("string").str.replace(",", ".", regex=False),
+                               errors="coerce").astype(float)
+            for var in variables
+        })
+        long = pd.DataFrame(keys).join(values).melt(id_vars=self.groups, var_name="variable", value_name="valeur")
+        return long.dropna(subset=["valeur", self.groups[0]])
+
+    def add(self, df):
+        """Ajoute les lignes de df aux statistiques"""
+        long = self._long(df)
+        if long is None or long.empty:
+            return
+
+        grouped = long.groupby(["variable"] + self.groups, dropna=False)["valeur"]
+        batch = grouped.agg(["count", "mean", "min", "max"]).rename(columns={"count": "n"})
+        batch["m2"] = grouped.var(ddof=0).to_numpy() * batch["n"]
+        self.table = _merge(self.table, batch[STATS]) if not self.table.empty else batch[STATS]
+
+    def summary(self, variable, groups=None):
+        """Effectif, moyenne, écart-type, min et max de `variable` par groupe (par défaut, tous les groupes).
+
+        Avec moins de groupes, les statistiques des sous-groupes sont regroupées sans revenir aux lignes.
+        """
+        groups = self.groups if groups is None else list(groups)
+        columns = ["n", "moyenne", "ecart_type", "min", "max"]
+        if variable not in self.table.index.get_level_values("variable"):
+            return pd.DataFrame(columns=groups + columns)
+
+        table = self.table.xs(variable, level="variable")
+        if groups != self.groups:
+            flat = table.reset_index()
+            keys = [flat[group] for group in groups]
+            somme = flat["n"] * flat["mean"]
+            moyenne = (somme.groupby(keys, dropna=False).transform("sum")
+                       / flat["n"].groupby(keys, dropna=False).transform("sum"))
+            # m2 du groupe = m2 des sous-groupes + écarts de leurs moyennes à la moyenne du groupe
+            flat["m2"] += flat["n"] * (flat["mean"] - moyenne) ** 2
+            flat["somme"] = somme
+            by = flat.groupby(groups, dropna=False)
+            table = by.agg(n=("n", "sum"), somme=("somme", "sum"), m2=("m2", "sum"),
+                           min=("min", "min"), max=("max", "max"))
+            table["mean"] = table["somme"] / table["n"]
+
+        ecart_type = np.sqrt(table["m2"] / (table["n"] - 1)).where(table["n"] > 1)
+        summary = pd.DataFrame({"n": table["n"], "moyenne": table["mean"], "ecart_type": ecart_type,
+                                "min": table["min"], "max": table["max"]})
+        return summary.reset_index()
@@ -0,0 +1,94 @@
+"""Cache de lecture partagé sur disque (SQLite) entre plusieurs réplicas de l'application.
+
+Chaque feuille y est stockée avec l'instant de son téléchargement et son signal de révision. Un verrou par
+feuille (avec expiration) garantit qu'un seul réplica à la fois la télécharge à nouveau ; les autres
+attendent le résultat au lieu d'interroger Google eux aussi.
+
+Le fichier doit se trouver sur un volume partagé qui prend en charge les verrous de fichiers (par exemple
+un volume Docker local) : SQLite n'est pas fiable sur un partage réseau (NFS, SMB).
+"""
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+
+class SharedCache:
+
+    def __init__(self, path, lock_timeout=60.0):
+        self.path = path
+        self.lock_timeout = lock_timeout
+        with closing(self._connect()) as db, db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS sheets "
+                       "(key TEXT PRIMARY KEY, revision TEXT, charge_le REAL NOT NULL, data BLOB NOT NULL)")
+            db.execute("CREATE TABLE IF NOT EXISTS locks "
+                       "(key TEXT PRIMARY KEY, owner TEXT NOT NULL, expire REAL NOT NULL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def owner():
+        """Identifiant du fil d'exécution courant, unique entre réplicas"""
+        return f"{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+
+    def get(self, key):
+        """Retourne {"df", "revision", "charge_le"} ou None si la feuille n'est pas en cache"""
+        with closing(self._connect()) as db:
+            row = db.execute("SELECT revision, charge_le, data FROM sheets WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        revision, charge_le, data = row
+        return {"df": pickle.loads(data), "revision": revision, "charge_le": charge_le}
+
+    def put(self, key, df, revision):
+        with closing(self._connect()) as db, db:
+            db.execute("INSERT OR REPLACE INTO sheets (key, revision, charge_le, data) VALUES (?, ?, ?, ?)",
+                       (key, revision, time.time(), pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)))
+
+    def touch(self, key):
+        """Marque la feuille comme vérifiée à l'instant (révision inchangée)"""
+        with closing(self._connect()) as db, db:
+            db.execute("UPDATE sheets SET charge_le = ? WHERE key = ?", (time.time(), key))
+
+    def invalidate(self, key):
+        """Marque la feuille comme périmée (lignes ajoutées ou archivées) : le prochain accès la télécharge"""
+        with closing(self._connect()) as db, db:
+            db.execute("UPDATE sheets SET charge_le = 0, revision = NULL WHERE key = ?", (key,))
+
+    def try_lock(self, key, owner):
+        """Prend le verrou de rafraîchissement de la feuille ; False si un autre réplica le détient"""
+        now = time.time()
+        with closing(self._connect()) as db, db:
+            db.execute("DELETE FROM locks WHERE key = ? AND expire < ?", (key, now))
+            cursor = db.execute("INSERT OR IGNORE INTO locks (key, owner, expire) VALUES (?, ?, ?)",
+                                (key, owner, now + self.lock_timeout))
+            return cursor.rowcount == 1
+
+    def unlock(self, key, owner):
+        with closing(self._connect()) as db, db:
+            db.execute("DELETE FROM locks WHERE key = ? AND owner = ?", (key, owner))
+
+    def is_locked(self, key):
+        with closing(self._connect()) as db:
+            row = db.execute("SELECT 1 FROM locks WHERE key = ? AND expire >= ?", (key, time.time())).fetchone()
+        return row is not None
+
+    def wait_for_refresh(self, key, since, timeout, poll=0.25):
+        """Attend qu'un autre réplica ait rafraîchi la feuille (téléchargement après `since`).
+
+        Retourne l'entrée rafraîchie, ou None si le verrou est libéré sans rafraîchissement ou si le délai expire.
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            entry = self.get(key)
+            if entry is not None and entry["charge_le"] > since:
+                return entry
+            if not self.is_locked(key):
+                return None
+            time.sleep(poll)
+        return None
@@ -0,0 +1,258 @@
+"""Lecture des Google Sheets et écriture des exports, sans Streamlit.
+
+Utilisé par l'application (app.py) et par la ligne de commande (cli.py) : les tables, la lecture des
+feuilles, la conversion des types et les formats d'export y sont les mêmes. Les bibliothèques lourdes
+(google-auth, gspread, pyarrow, xlsxwriter) ne sont importées qu'à leur première utilisation.
+"""
+import io
+import os
+
+import pandas as pd
+
+INSCRIPTION = 'inscription'
+PIECE = 'piece'
+OBS_PLANTE = 'obs_plante'
+OBS_FEUILLE = 'obs_feuille'
+
+PEER_REVIEW = 'peer_review'
+
+# Toutes les tables encodées via l'application (clé dans les secrets : libellé)
+DATASETS = {
+    "url_eau": "TP1 - poromètre",
+    "url_irga": "TP5 - IRGA",
+    "url_poro": "TP5 - poromètre",
+    "url_croissance": "TP5 - croissance",
+    "url_fluo": "TP5 - fluorimètre",
+    "url_chloro": "TP5 - chlorophyllomètre",
+    INSCRIPTION: "Tournesol - inscriptions",
+    PIECE: "Tournesol - pièces",
+    OBS_PLANTE: "Tournesol - observations de la plante entière",
+    OBS_FEUILLE: "Tournesol - observations des feuilles",
+    PEER_REVIEW: "TP7 - évaluations par les pairs",
+}
+
+# Colonne de date de chaque table, utilisée pour la répartition par année académique (None : pas de date,
+# la table n'est pas archivée car ses lignes sont référencées par la cohorte en cours)
+DATE_COLUMNS = {
+    "url_eau": "date",
+    "url_irga": "date",
+    "url_poro": "date",
+    "url_croissance": "date",
+    "url_fluo": "date",
+    "url_chloro": "date",
+    INSCRIPTION: "date_reception",
+    PIECE: None,
+    OBS_PLANTE: "date",
+    OBS_FEUILLE: "date",
+    PEER_REVIEW: None,
+}
+
+
+def archive_dir(secrets):
+    """Dossier des archives Parquet (archive_dir dans les secrets, à placer sur un volume persistant), le même
+    pour l'application et la ligne de commande : les lignes archivées n'y sont pas relues"""
+    return secrets.get("archive_dir", os.path.join(os.path.dirname(os.path.abspath(__file__)), "archives"))
+
+
+SCOPES = ["https://www.googleapis.com/auth/spreadsheets",
+          "https://www.googleapis.com/auth/drive.metadata.readonly"]
+DRIVE_FILES_URL = "https://www.googleapis.com/drive/v3/files/"
+
+# Quota de l'API Google Sheets pour un compte de service (requêtes par minute), modifiable via
+# la section [quota] des secrets. Chaque lecture ou écriture coûte 3 requêtes : ouverture du fichier
+# (open_by_url), métadonnées de la première feuille (sheet1), puis lecture ou écriture des valeurs.
+# Une lecture par colonnes coûte une requête de plus quand les en-têtes de la feuille ne sont pas connus.
+SHEETS_REQUESTS_PER_MINUTE = 60
+SHEETS_BURST = 10
+SHEETS_REQUESTS_PER_CALL = 3
+SHEETS_REQUESTS_HEADERS = 1
+SHEETS_QUEUE_TIMEOUT = 30
+
+
+class HeadersChanged(ValueError):
+    """Les en-têtes connus d'une feuille ne correspondent plus à la feuille (colonnes ajoutées ou déplacées)"""
+
+
+# --- CONNEXION GOOGLE ---
+def make_credentials(sks):
+    """Credentials du compte de service à partir de la section [connections.gsheets] des secrets"""
+    from google.oauth2 import service_account
+
+    credentials_dict = {
+        "type": "service_account",
+        "project_id": sks["project_id"],
+        "private_key_id": sks["private_key_id"],
+        "private_key": sks["private_key"],
+        "client_email": sks["client_email"],
+        "client_id": sks["client_id"],
+        "auth_uri": sks["auth_uri"],
+        "token_uri": "https://oauth2.googleapis.com/token",
+        "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
+        "client_x509_cert_url": sks.get("client_x509_cert_url") # optionnel selon votre JSON
+    }
+
+    return service_account.Credentials.from_service_account_info(credentials_dict, scopes=SCOPES)
+
+
+def fetch_revision(session, url):
+    """Signal de révision léger du fichier (version et date de modification Drive).
+
+    Ne consomme pas le quota de l'API Sheets. Retourne None si le signal n'est pas disponible.
+    """
+    try:
+        from gspread.utils import extract_id_from_url
+
+        response = session.get(DRIVE_FILES_URL + extract_id_from_url(url),
+                               params={"fields": "version,modifiedTime", "supportsAllDrives": "true"},
+                               timeout=10)
+        response.raise_for_status()
+        metadata = response.json()
+        return f"{metadata['version']}/{metadata['modifiedTime']}"
+    except Exception:
+        return None
+
+
+# --- LECTURE ---
+def convert_types(df):
+    """Convertit en nombres les colonnes qui s'y prêtent (virgule ou point comme séparateur décimal)"""
+    # Fix: replace comma decimal separator with dot and convert to numeric where possible
+    for col in df.columns:
+        converted = df[col].str.replace(',', '.', regex=False)
+        try:
+            df[col] = pd.to_numeric(converted)
+        except (ValueError, AttributeError):
+            # Keep as string if conversion fails
+            df[col] = df[col]
+    return df
+
+
+def read_worksheet(worksheet, skip_rows=0):
+    """Lit une feuille et retourne un DataFrame, sans les skip_rows premières lignes de données"""
+    if skip_rows == 0:
+        # Use get_all_values() instead of get_all_records() to get raw strings
+        data = worksheet.get_all_values()
+    else:
+        # En-têtes et lignes suivant les lignes ignorées, en une seule requête
+        ranges = ["1:1"] + ([f"{skip_rows + 2}:{worksheet.row_count}"] if skip_rows + 2 <= worksheet.row_count else [])
+        values = worksheet.batch_get(ranges)
+        headers = values[0][0] if values[0] else []
+        rows = values[1] if len(values) > 1 else []
+        # Comme get_all_values(), on complète les lignes dont les dernières cellules sont vides
+        data = [headers] + [row[:len(headers)] + [""] * (len(headers) - len(row)) for row in rows] if headers else []
+
+    if not data:
+        return pd.DataFrame()
+
+    headers = data[0]
+    rows = data[1:]
+    return convert_types(pd.DataFrame(rows, columns=headers))
+
+
+def _column_blocks(positions):
+    """Regroupe des positions de colonnes triées en blocs contigus [(première, dernière), ...]"""
+    blocks = []
+    for position in positions:
+        if blocks and blocks[-1][1] == position - 1:
+            blocks[-1] = (blocks[-1][0], position)
+        else:
+            blocks.append((position, position))
+    return blocks
+
+
+def read_columns(worksheet, columns, skip_rows=0, headers=None):
+    """Lit seulement les colonnes `columns` d'une feuille, en une requête (plages de colonnes contiguës).
+
+    `headers` : en-têtes de la feuille déjà connus (sinon lus en une requête de plus). Lève HeadersChanged
+    s'ils ne correspondent plus à la feuille : l'appelant relit alors sans `headers`.
+    Retourne le DataFrame, la position de ses colonnes dans la feuille et les en-têtes de la feuille.
+    """
+    from gspread.utils import rowcol_to_a1
+
+    headers_connus = headers is not None
+    if not headers_connus:
+        headers = worksheet.row_values(1)
+
+    positions = sorted(headers.index(col) for col in set(columns) if col in headers)
+    if not positions:
+        return pd.DataFrame(), [], headers
+    blocks = _column_blocks(positions)
+
+    # Pour chaque bloc : sa ligne d'en-têtes, puis ses lignes de données (après les lignes ignorées)
+    first_row = skip_rows + 2
+    ranges = []
+    for debut, fin in blocks:
+        ranges.append(f"{rowcol_to_a1(1, debut + 1)}:{rowcol_to_a1(1, fin + 1)}")
+        if first_row <= worksheet.row_count:
+            ranges.append(f"{rowcol_to_a1(first_row, debut + 1)}:{rowcol_to_a1(worksheet.row_count, fin + 1)}")
+    values = worksheet.batch_get(ranges)
+
+    step = 2 if first_row <= worksheet.row_count else 1
+    block_headers = [values[i][0] if values[i] else [] for i in range(0, len(values), step)]
+    expected = [headers[debut:fin + 1] for debut, fin in blocks]
+    if [h + [""] * (len(e) - len(h)) for h, e in zip(block_headers, expected)] != expected:
+        if not headers_connus:
+            raise ValueError("les en-têtes de la feuille ont changé pendant la lecture")
+        raise HeadersChanged("les colonnes de la feuille ont changé depuis la lecture des en-têtes")
+
+    # Les lignes (et cellules) vides en fin de plage ne sont pas renvoyées : on complète chaque bloc
+    block_rows = [values[i + 1] if step == 2 else [] for i in range(0, len(values), step)]
+    n_rows = max(len(rows) for rows in block_rows)
+    rows = [[] for _ in range(n_rows)]
+    for (debut, fin), block in zip(blocks, block_rows):
+        width = fin - debut + 1
+        block = block + [[]] * (n_rows - len(block))
+        for row, cells in zip(rows, block):
+            row.extend(cells[:width] + [""] * (width - len(cells)))
+
+    df = convert_types(pd.DataFrame(rows, columns=[headers[i] for i in positions]))
+    return df, positions, headers
+
+
+# --- EXPORT ---
+def to_arrow(df):
+    """Table Arrow d'un DataFrame (les colonnes de types mélangés sont converties en texte)"""
+    import pyarrow as pa
+
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Colonnes de texte (object ou StringDtype) aux valeurs de types mélangés
+        texte = [col for col in df.columns
+                 if pd.api.types.is_object_dtype(df[col]) or pd.api.types.is_string_dtype(df[col])]
+        return pa.Table.from_pandas(df.astype({col: str for col in texte}), preserve_index=False)
+
+
+def write_csv(df, fileobj, chunk_rows=None):
+    """Écrit un DataFrame au format .csv dans fileobj (fichier binaire), par blocs de chunk_rows lignes"""
+    # on utilise utf-8-sig pour que les accents s'affichent bien dans Excel
+    csv_text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    df.head(0).to_csv(csv_text, index=False)
+    for chunk in iter_chunks(df, chunk_rows or max(len(df), 1)):
+        chunk.to_csv(csv_text, index=False, header=False)
+    # fileobj reste ouvert : c'est à l'appelant de le fermer
+    csv_text.flush()
+    csv_text.detach()
+
+
+def to_csv(df):
+    """Convertit un DataFrame en fichier .csv"""
+    buffer = io.BytesIO()
+    write_csv(df, buffer)
+    return buffer.getvalue()
+
+
+def to_excel(df):
+    """Convertit un DataFrame en fichier .xlsx"""
+    buffer = io.BytesIO()
+
+    # Le fichier n'est complet qu'à la fermeture du writer : on lit le buffer après le bloc with
+    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+        df.to_excel(writer, index=False)
+
+    return buffer.getvalue()
+
+
+def iter_chunks(df, chunk_rows):
+    """Découpe un DataFrame en blocs de chunk_rows lignes"""
+    for debut in range(0, len(df), chunk_rows):
+        yield df.iloc[debut:debut + chunk_rows]